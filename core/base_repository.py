@@ -9,32 +9,30 @@ class BaseRepository(Generic[T]):
     def __init__(self, model: Type[T]):
         self.model = model
 
-    def findById(self, id: int) -> Optional[T]:
-        with getSession() as session:
-            return session.get(self.model, id)
+    async def findById(self, id: int) -> Optional[T]:
+        async with getSession() as session:
+            return await session.get(self.model, id)
 
-    def findAll(self) -> List[T]:
-        with getSession() as session:
+    async def findAll(self) -> List[T]:
+        async with getSession() as session:
             statement = select(self.model)
-            return session.exec(statement).all()
+            return (await session.exec(statement)).all()
 
-    def save(self, obj: T) -> T:
-        with getSession() as session:
+    async def save(self, obj: T) -> T:
+        async with getSession() as session:
             try:
                 session.add(obj)
-                session.commit()
-                session.refresh(obj)
+                await session.flush()
                 return obj
             except IntegrityError as e:
-                session.rollback()
                 raise ValueError(self.ParseIntegrityError(e))
 
-    def deleteById(self, id: int) -> None:
-        with getSession() as session:
-            obj = session.get(self.model, id)
+    async def deleteById(self, id: int) -> None:
+        async with getSession() as session:
+            obj = await session.get(self.model, id)
             if obj:
-                session.delete(obj)
-                session.commit()
+                await session.delete(obj)
+                await session.flush()
 
     def ParseIntegrityError(self, error: IntegrityError) -> str:
         orig_msg = str(error.orig)
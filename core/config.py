@@ -12,6 +12,12 @@ class Settings(BaseSettings):
     debug_mode: bool = Field(False, env="DEBUG_MODE")
 
     database_url: str = Field(..., env="DATABASE_URL")
+    database_pool_size: int = Field(5, env="DATABASE_POOL_SIZE")
+    database_max_overflow: int = Field(10, env="DATABASE_MAX_OVERFLOW")
+    database_pool_timeout: float = Field(30, env="DATABASE_POOL_TIMEOUT")
+    database_pool_recycle: int = Field(1800, env="DATABASE_POOL_RECYCLE")
+    database_pool_pre_ping: bool = Field(True, env="DATABASE_POOL_PRE_PING")
+    database_statement_timeout_ms: int = Field(0, env="DATABASE_STATEMENT_TIMEOUT_MS")
     origin_url: str = Field(..., env="ORIGIN_URL")
     initial_admin_email: str = Field(..., env="INITIAL_ADMIN_EMAIL")
     initial_admin_username: str = Field(..., env="INITIAL_ADMIN_USERNAME")
@@ -19,14 +25,43 @@ class Settings(BaseSettings):
     secret_key: str = Field(..., env="SECRET_KEY")
     algorithm: str = Field("HS256", env="ALGORITHM")
     access_token_expire_minutes: int = Field(30, env="ACCESS_TOKEN_EXPIRE_MINUTES")
+    jwt_self_contained_claims: bool = Field(False, env="JWT_SELF_CONTAINED_CLAIMS")
     unique_token_expire_days: int = Field(30, env="UNIQUE_TOKEN_EXPIRE_DAYS")
     verification_uuid_expire_days: int = Field(1, env="VERIFICATION_UUID_EXPIRE_DAYS")
+    auth_user_cache_size: int = Field(1024, env="AUTH_USER_CACHE_SIZE")
+    # Cada worker tiene su propia caché, el TTL acota cuánto tarda en verse un cambio hecho en otro
+    auth_user_cache_ttl_seconds: float = Field(30, env="AUTH_USER_CACHE_TTL_SECONDS")
+
+    connection_status_flush_interval_seconds: float = Field(0.5, env="CONNECTION_STATUS_FLUSH_INTERVAL_SECONDS")
+    current_position_flush_interval_seconds: float = Field(1, env="CURRENT_POSITION_FLUSH_INTERVAL_SECONDS")
+    position_angles_binary: bool = Field(False, env="POSITION_ANGLES_BINARY")
+
+    max_robots_per_user: int = Field(2, env="MAX_ROBOTS_PER_USER")
+    max_movements_per_robot: int = Field(10, env="MAX_MOVEMENTS_PER_ROBOT")
+    max_positions_per_movement: int = Field(16, env="MAX_POSITIONS_PER_MOVEMENT")
+    max_servos_per_robot: int = Field(24, env="MAX_SERVOS_PER_ROBOT")
+
+    ownership_index_size: int = Field(10000, env="OWNERSHIP_INDEX_SIZE")
+    ownership_index_ttl_seconds: float = Field(300, env="OWNERSHIP_INDEX_TTL_SECONDS")
+    movement_payload_cache_size: int = Field(1024, env="MOVEMENT_PAYLOAD_CACHE_SIZE")
+    movement_payload_cache_ttl_seconds: float = Field(300, env="MOVEMENT_PAYLOAD_CACHE_TTL_SECONDS")
 
     mqtt_broker_url: str = Field(..., env="MQTT_BROKER_URL")
     mqtt_broker_port: int = Field(8883, env="MQTT_BROKER_PORT")
     mqtt_client_id: str = Field(..., env="MQTT_CLIENT_ID")
     mqtt_username: str = Field(..., env="MQTT_USERNAME")
     mqtt_password: str = Field(..., env="MQTT_PASSWORD")
+    # paho o null (sin broker, descarta lo que se publica)
+    mqtt_transport: str = Field("paho", env="MQTT_TRANSPORT")
+    robot_uid_refresh_interval_seconds: float = Field(30, env="ROBOT_UID_REFRESH_INTERVAL_SECONDS")
+    mqtt_ingest_queue_size: int = Field(10000, env="MQTT_INGEST_QUEUE_SIZE")
+    mqtt_ingest_workers: int = Field(4, env="MQTT_INGEST_WORKERS")
+    mqtt_ingest_drain_timeout_seconds: float = Field(5, env="MQTT_INGEST_DRAIN_TIMEOUT_SECONDS")
+    mqtt_outbound_buffer_size: int = Field(1000, env="MQTT_OUTBOUND_BUFFER_SIZE")
+    mqtt_outbound_message_ttl_seconds: float = Field(60, env="MQTT_OUTBOUND_MESSAGE_TTL_SECONDS")
+    mqtt_reconnect_min_delay_seconds: float = Field(1, env="MQTT_RECONNECT_MIN_DELAY_SECONDS")
+    mqtt_reconnect_max_delay_seconds: float = Field(60, env="MQTT_RECONNECT_MAX_DELAY_SECONDS")
+    mqtt_stop_timeout_seconds: float = Field(5, env="MQTT_STOP_TIMEOUT_SECONDS")
 
     # Configuraciones de correo electrónico
     mail_username: str = Field(..., env="MAIL_USERNAME")
@@ -1,4 +1,5 @@
 from dependency_injector import containers, providers
+from core.unit_of_work import UnitOfWork
 from crosscutting.service.cloudinary_service import CloudinaryService
 from device.domain.persistence.movement_repository import MovementRepository
 from device.domain.persistence.position_repository import PositionRepository
@@ -12,8 +13,20 @@ from security.service.auth_service import AuthService
 from crosscutting.service.email_service import EmailService
 from security.service.user_service import UserService
 from device.service.robot_service import RobotService
+from device.service.current_position_store import CurrentPositionStore
+from device.service.connection_status_batcher import ConnectionStatusBatcher
+from device.service.robot_uid_index import RobotUidIndex
+from crosscutting.mqtt_client import createMqttClient
+from crosscutting.mqtt_connection import MqttConnection
+from crosscutting.mqtt_ingest import MqttIngestPipeline
+from crosscutting.ownership_index import OwnershipIndex
+from crosscutting.cache import RevocationList, TTLCache
+from core.config import settings
 
 class Container(containers.DeclarativeContainer):
+    # Unidad de trabajo por petición, compartida por todos los repositorios
+    unitOfWork = providers.Factory(UnitOfWork)
+
     # Repositories
     userRepository = providers.Factory(UserRepository)
     robotRepository = providers.Factory(RobotRepository)
@@ -21,14 +34,33 @@ class Container(containers.DeclarativeContainer):
     movementRepository = providers.Factory(MovementRepository)
     positionRepository = providers.Factory(PositionRepository)
     
+    # Una sola instancia por proceso, la arranca y la para el lifespan de la aplicación
+    currentPositionStore = providers.Singleton(CurrentPositionStore, robotRepository=robotRepository, flushInterval=settings.current_position_flush_interval_seconds)
+    mqttConnection = providers.Singleton(MqttConnection, clientFactory=providers.Object(createMqttClient),
+                                         bufferSize=settings.mqtt_outbound_buffer_size, messageTtlSeconds=settings.mqtt_outbound_message_ttl_seconds,
+                                         minReconnectDelay=settings.mqtt_reconnect_min_delay_seconds, maxReconnectDelay=settings.mqtt_reconnect_max_delay_seconds,
+                                         stopTimeout=settings.mqtt_stop_timeout_seconds)
+    mqttIngestPipeline = providers.Singleton(MqttIngestPipeline, maxSize=settings.mqtt_ingest_queue_size, workers=settings.mqtt_ingest_workers,
+                                             drainTimeout=settings.mqtt_ingest_drain_timeout_seconds)
+    # Payload MQTT ya serializado de cada movimiento y la última posición resultante, por (id, payload_version)
+    movementPayloadCache = providers.Singleton(TTLCache, maxSize=settings.movement_payload_cache_size, ttlSeconds=settings.movement_payload_cache_ttl_seconds)
+    robotUidIndex = providers.Singleton(RobotUidIndex, robotRepository=robotRepository, refreshInterval=settings.robot_uid_refresh_interval_seconds)
+    ownershipIndex = providers.Singleton(OwnershipIndex, maxSize=settings.ownership_index_size, ttlSeconds=settings.ownership_index_ttl_seconds)
+    # Usuarios ya verificados por email, evita consultar la BD en cada petición autenticada.
+    # Es una caché por proceso: los cambios hechos en otro worker se ven como mucho tras el TTL.
+    authenticatedUserCache = providers.Singleton(TTLCache, maxSize=settings.auth_user_cache_size, ttlSeconds=settings.auth_user_cache_ttl_seconds)
+    # Usuarios cuyos tokens emitidos hasta ahora dejan de valer (cambio de contraseña, de rol o borrado)
+    revokedTokens = providers.Singleton(RevocationList, ttlSeconds=settings.access_token_expire_minutes * 60)
+    connectionStatusBatcher = providers.Singleton(ConnectionStatusBatcher, robotRepository=robotRepository, flushInterval=settings.connection_status_flush_interval_seconds)
+    
     # Services
     emailService = providers.Factory(EmailService)
     cloudinaryService = providers.Factory(CloudinaryService)
-    userService = providers.Factory(UserService, userRepository=userRepository)
-    authService = providers.Factory(AuthService, userRepository=userRepository, emailService=emailService)
+    userService = providers.Factory(UserService, userRepository=userRepository, servoGroupRepository=servoGroupRepository, movementRepository=movementRepository, positionRepository=positionRepository, robotUidIndex=robotUidIndex, ownershipIndex=ownershipIndex, authenticatedUserCache=authenticatedUserCache, revokedTokens=revokedTokens)
+    authService = providers.Factory(AuthService, userRepository=userRepository, emailService=emailService, authenticatedUserCache=authenticatedUserCache, revokedTokens=revokedTokens)
     
-    robotService  = providers.Factory(RobotService, robotRepository=robotRepository, movementRepository=movementRepository, positionRepository=positionRepository, cloudinaryService=cloudinaryService)
-    servoGroupService = providers.Factory(ServoGroupService, servoGroupRepository=servoGroupRepository)
-    movementService = providers.Factory(MovementService, movementRepository=movementRepository, positionRepository=positionRepository)
-    positionService = providers.Factory(PositionService, positionRepository=positionRepository)
+    robotService  = providers.Factory(RobotService, robotRepository=robotRepository, movementRepository=movementRepository, positionRepository=positionRepository, cloudinaryService=cloudinaryService, currentPositionStore=currentPositionStore, connectionStatusBatcher=connectionStatusBatcher, robotUidIndex=robotUidIndex, mqttConnection=mqttConnection, movementPayloadCache=movementPayloadCache, ownershipIndex=ownershipIndex)
+    servoGroupService = providers.Factory(ServoGroupService, servoGroupRepository=servoGroupRepository, userRepository=userRepository, ownershipIndex=ownershipIndex)
+    movementService = providers.Factory(MovementService, movementRepository=movementRepository, positionRepository=positionRepository, userRepository=userRepository, ownershipIndex=ownershipIndex)
+    positionService = providers.Factory(PositionService, positionRepository=positionRepository, movementRepository=movementRepository, ownershipIndex=ownershipIndex)
     
\ No newline at end of file
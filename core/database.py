@@ -1,13 +1,130 @@
-from sqlmodel import Session, create_engine
-from contextlib import contextmanager
+import threading
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlmodel.ext.asyncio.session import AsyncSession
 from core.config import settings
 
-engine = create_engine(settings.database_url)
+# Driver asincrono a usar para cada backend cuando la URL trae un driver sincrono
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "mysql": "aiomysql",
+    "sqlite": "aiosqlite",
+}
 
-@contextmanager
-def getSession():
-    session = Session(engine)
-    try:
+def getAsyncDatabaseUrl(databaseUrl: str):
+    url = make_url(databaseUrl)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS or url.get_driver_name() == ASYNC_DRIVERS[backend]:
+        return url
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+class MonitoredQueuePool(AsyncAdaptedQueuePool):
+    # Pool que mide cuánto espera cada checkout por una conexión libre
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.totalWait = 0.0
+        self.maxWait = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            with self.lock:
+                self.timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            with self.lock:
+                self.checkouts += 1
+                self.totalWait += wait
+                self.maxWait = max(self.maxWait, wait)
+
+def getStatementTimeoutArgs(backend: str, timeoutMs: int):
+    if timeoutMs <= 0:
+        return {}
+    if backend == "postgresql":
+        return {"server_settings": {"statement_timeout": str(timeoutMs)}}
+    if backend == "mysql":
+        return {"init_command": f"SET SESSION max_execution_time={timeoutMs}"}
+    return {}
+
+def createEngine(databaseUrl: str):
+    url = getAsyncDatabaseUrl(databaseUrl)
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        # SQLite no usa un pool de conexiones en red, se mantiene su pool por defecto
+        return create_async_engine(url)
+
+    return create_async_engine(
+        url,
+        poolclass=MonitoredQueuePool,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_timeout=settings.database_pool_timeout,
+        pool_recycle=settings.database_pool_recycle,
+        pool_pre_ping=settings.database_pool_pre_ping,
+        connect_args=getStatementTimeoutArgs(backend, settings.database_statement_timeout_ms),
+    )
+
+engine = createEngine(settings.database_url)
+
+def getPoolStatistics():
+    pool = engine.pool
+    statistics = {"pool_class": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        statistics.update(size=pool.size(),
+                          checked_in=pool.checkedin(),
+                          checked_out=pool.checkedout(),
+                          overflow=max(pool.overflow(), 0))
+    if isinstance(pool, MonitoredQueuePool):
+        with pool.lock:
+            statistics.update(max_overflow=settings.database_max_overflow,
+                              checkouts=pool.checkouts,
+                              timeouts=pool.timeouts,
+                              total_wait_ms=pool.totalWait * 1000,
+                              max_wait_ms=pool.maxWait * 1000,
+                              avg_wait_ms=pool.totalWait * 1000 / pool.checkouts if pool.checkouts else 0.0)
+    return statistics
+
+# Sesión de la unidad de trabajo activa (una por petición HTTP), ver core/unit_of_work.py
+currentSession: ContextVar[Optional[AsyncSession]] = ContextVar("currentSession", default=None)
+
+# Ejecuta callback cuando la transacción en curso haga commit (p. ej. invalidar cachés en memoria),
+# para que un rollback no deje la caché con datos que nunca llegaron a la BD.
+# Sin unidad de trabajo cada repositorio ya hizo commit al salir de getSession, se ejecuta en el momento.
+def afterCommit(callback: Callable[[], None]):
+    session = currentSession.get()
+    if session is None:
+        callback()
+        return
+    session.info.setdefault("afterCommit", []).append(callback)
+
+def runAfterCommit(session: AsyncSession):
+    for callback in session.info.pop("afterCommit", []):
+        callback()
+
+@asynccontextmanager
+async def getSession():
+    session = currentSession.get()
+    if session is not None:
+        # Se comparte la sesión de la unidad de trabajo, que es quien hace commit al final
         yield session
-    finally:
-        session.close()
+        return
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
@@ -6,9 +6,9 @@ from security.domain.persistence.user_repository import UserRepository
 from security.service.auth_service import pwd_context
 from core.config import settings
 
-def defaultData(userRepository: UserRepository):
-    if not userRepository.findByEmail(settings.initial_admin_email):
-        userRepository.save(User(
+async def defaultData(userRepository: UserRepository):
+    if not await userRepository.findByEmail(settings.initial_admin_email):
+        await userRepository.save(User(
             verification_uuid=str(uuid.uuid4()),
             unique_token=secrets.token_urlsafe(32),
             email=settings.initial_admin_email,
@@ -0,0 +1,83 @@
+import json
+from sqlalchemy import JSON, bindparam, inspect, select, text, update
+from sqlmodel import SQLModel
+from core.config import settings
+from device.domain.model.movement import Movement
+from device.domain.model.position import Position
+from device.domain.model.position_angles import packAngles
+from device.domain.model.robot import Robot
+from device.domain.model.servo_group import ServoGroup
+
+# create_all solo crea las tablas que faltan, las columnas nuevas (nullables) de tablas existentes se añaden aquí
+def addMissingColumns(connection):
+    inspector = inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    for table in SQLModel.metadata.sorted_tables:
+        existingColumns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existingColumns or not column.nullable:
+                continue
+            columnType = column.type.compile(dialect=connection.dialect)
+            connection.execute(text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} {columnType} NULL"))
+
+# Pasa a JSON nativo (JSONB en PostgreSQL) las columnas JSON que en BD siguen siendo de texto.
+# SQLite guarda el JSON como texto, no necesita cambios.
+def convertJsonColumns(connection):
+    backend = connection.dialect.name
+    if backend not in ("postgresql", "mysql"):
+        return
+    inspector = inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    for table in SQLModel.metadata.sorted_tables:
+        existingColumns = {column["name"]: column["type"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if not isinstance(column.type, JSON) or column.name not in existingColumns or isinstance(existingColumns[column.name], JSON):
+                continue
+            tableName, columnName = preparer.format_table(table), preparer.format_column(column)
+            if backend == "postgresql":
+                connection.execute(text(f"ALTER TABLE {tableName} ALTER COLUMN {columnName} TYPE JSONB USING {columnName}::jsonb"))
+            else:
+                connection.execute(text(f"ALTER TABLE {tableName} MODIFY {columnName} JSON NULL"))
+
+# create_all solo crea las tablas que faltan, los índices nuevos de tablas existentes se crean aquí
+def createMissingIndexes(connection):
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+# Rellena las columnas de dueño desnormalizadas de las filas creadas antes de existir
+def backfillOwnerColumns(connection):
+    robotOwner = select(Robot.user_id).where(Robot.id == Movement.robot_id).scalar_subquery()
+    connection.execute(update(Movement).where(Movement.user_id.is_(None)).values(user_id=robotOwner))
+
+    robotOwner = select(Robot.user_id).where(Robot.id == ServoGroup.robot_id).scalar_subquery()
+    connection.execute(update(ServoGroup).where(ServoGroup.user_id.is_(None)).values(user_id=robotOwner))
+
+    movementRobot = select(Movement.robot_id).where(Movement.id == Position.movement_id).scalar_subquery()
+    movementOwner = select(Movement.user_id).where(Movement.id == Position.movement_id).scalar_subquery()
+    connection.execute(update(Position)
+                       .where(Position.robot_id.is_(None) | Position.user_id.is_(None))
+                       .values(robot_id=movementRobot, user_id=movementOwner))
+
+# Con el formato binario activo, pasa a uint8 los ángulos que siguen guardados como JSON
+def packPositionAngles(connection, batchSize: int = 1000):
+    if not settings.position_angles_binary:
+        return
+    statement = (update(Position)
+                 .where(Position.id == bindparam("position_id"))
+                 .values(angles="", angles_packed=bindparam("packed")))
+    while True:
+        rows = connection.execute(select(Position.id, Position.angles)
+                                  .where(Position.angles_packed.is_(None))
+                                  .order_by(Position.id)
+                                  .limit(batchSize)).all()
+        if not rows:
+            return
+        connection.execute(statement, [{"position_id": row.id, "packed": packAngles(json.loads(row.angles))} for row in rows])
+
+def runMigrations(connection):
+    addMissingColumns(connection)
+    convertJsonColumns(connection)
+    createMissingIndexes(connection)
+    backfillOwnerColumns(connection)
+    packPositionAngles(connection)
@@ -0,0 +1,23 @@
+from sqlmodel.ext.asyncio.session import AsyncSession
+from core.database import currentSession, engine, runAfterCommit
+
+class UnitOfWork:
+    def __init__(self):
+        self.session = None
+        self.token = None
+
+    async def __aenter__(self):
+        self.session = AsyncSession(engine, expire_on_commit=False)
+        self.token = currentSession.set(self.session)
+        return self
+
+    async def __aexit__(self, excType, exc, traceback):
+        try:
+            if excType is None:
+                await self.session.commit()
+                runAfterCommit(self.session)
+            else:
+                await self.session.rollback()
+        finally:
+            currentSession.reset(self.token)
+            await self.session.close()
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends
+from dependency_injector.wiring import inject, Provide
+from core.container import Container
+from core.database import getPoolStatistics
+from crosscutting.authorization import authorizeRoles
+from crosscutting.mqtt_connection import MqttConnection
+from crosscutting.mqtt_ingest import MqttIngestPipeline
+from crosscutting.resource.response.metrics_response import DatabasePoolResponse, MqttIngestResponse, MqttOutboundResponse
+from security.domain.model.user import Role
+
+# Definir el router con prefijo y etiqueta
+router = APIRouter(
+    prefix="/api/v1/metrics",
+    tags=["metrics"]
+)
+
+@router.get("/database-pool", response_model=DatabasePoolResponse, dependencies=[Depends(authorizeRoles([Role.ADMIN]))])
+async def getDatabasePoolMetrics():
+    return DatabasePoolResponse(**getPoolStatistics())
+
+@router.get("/mqtt-ingest", response_model=MqttIngestResponse, dependencies=[Depends(authorizeRoles([Role.ADMIN]))])
+@inject
+async def getMqttIngestMetrics(mqttIngestPipeline: MqttIngestPipeline = Depends(Provide[Container.mqttIngestPipeline])):
+    return MqttIngestResponse(**mqttIngestPipeline.getStatistics())
+
+@router.get("/mqtt-outbound", response_model=MqttOutboundResponse, dependencies=[Depends(authorizeRoles([Role.ADMIN]))])
+@inject
+async def getMqttOutboundMetrics(mqttConnection: MqttConnection = Depends(Provide[Container.mqttConnection])):
+    return MqttOutboundResponse(**mqttConnection.getStatistics())
@@ -1,19 +1,55 @@
-from fastapi import Depends
+from typing import Optional
+from dependency_injector.wiring import inject, Provide
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from security.domain.model.user import Role, User
+from security.service.auth_service import AuthService
 from core.container import Container
 
 security = HTTPBearer()
 
-# Configuramos el contenedor
-container = Container()
-authService = container.authService()
+class AuthContext:
+    # Identidad de la petición, se resuelve una sola vez y se reutiliza en todas las dependencias.
+    # Con tokens autocontenidos el usuario completo solo se carga si un endpoint lo pide.
+    def __init__(self, userId: int, email: str, role: Role, user: Optional[User] = None):
+        self.userId = userId
+        self.email = email
+        self.role = role
+        self.user = user
 
-def getAuthenticatedUser(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
-    current_user = authService.validateJWToken(token=credentials.credentials)
-    return current_user
+    @classmethod
+    def fromUser(cls, user: User):
+        return cls(userId=user.id, email=user.email, role=user.role, user=user)
+
+    def authorizeRoles(self, roles: list[Role]):
+        if self.role not in roles:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permission denied")
+        return True
+
+@inject
+async def getAuthContext(request: Request,
+                         credentials: HTTPAuthorizationCredentials = Depends(security),
+                         authService: AuthService = Depends(Provide[Container.authService])) -> AuthContext:
+    # request.state guarda el contexto aunque la dependencia se resuelva más de una vez
+    authContext = getattr(request.state, "authContext", None)
+    if authContext is None:
+        payload = authService.decodeJWToken(credentials.credentials)
+        claims = authService.getSelfContainedClaims(payload)
+        if claims:
+            authContext = AuthContext(userId=claims["user_id"], email=claims["email"], role=claims["role"])
+        else:
+            authContext = AuthContext.fromUser(await authService.getVerifiedUserByEmail(payload["email"]))
+        request.state.authContext = authContext
+    return authContext
+
+@inject
+async def getAuthenticatedUser(authContext: AuthContext = Depends(getAuthContext),
+                               authService: AuthService = Depends(Provide[Container.authService])) -> User:
+    if authContext.user is None:
+        authContext.user = await authService.getVerifiedUserByEmail(authContext.email)
+    return authContext.user
 
 def authorizeRoles(roles: list[Role]):
-    def wrapper(current_user: User = Depends(getAuthenticatedUser)):
-        return authService.authorizeRoles(current_user, roles)
+    def wrapper(authContext: AuthContext = Depends(getAuthContext)):
+        return authContext.authorizeRoles(roles)
     return wrapper
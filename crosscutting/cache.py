@@ -0,0 +1,61 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+class TTLCache:
+    # Cache LRU acotada cuyas entradas caducan pasados ttlSeconds desde que se guardaron
+    def __init__(self, maxSize: int, ttlSeconds: float):
+        self.maxSize = maxSize
+        self.ttlSeconds = ttlSeconds
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expiresAt, value = entry
+            if expiresAt < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        if self.maxSize <= 0 or self.ttlSeconds <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttlSeconds, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxSize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+class RevocationList:
+    # Momento de revocación por clave. Solo se recuerda durante ttlSeconds (la vida de un token),
+    # pasado ese tiempo los tokens emitidos antes ya han caducado por sí solos
+    def __init__(self, ttlSeconds: float):
+        self.ttlSeconds = ttlSeconds
+        self.lock = threading.Lock()
+        self.revokedAt: dict[Hashable, float] = {}
+
+    def revoke(self, key: Hashable):
+        now = time.time()
+        with self.lock:
+            for expiredKey in [k for k, revokedAt in self.revokedAt.items() if revokedAt + self.ttlSeconds < now]:
+                del self.revokedAt[expiredKey]
+            self.revokedAt[key] = now
+
+    def isRevoked(self, key: Hashable, issuedAt: float) -> bool:
+        with self.lock:
+            revokedAt = self.revokedAt.get(key)
+        return revokedAt is not None and issuedAt <= revokedAt
@@ -1,8 +1,54 @@
+import logging
 import paho.mqtt.client as mqtt
 from core.config import settings
 
-mqttClient = mqtt.Client(client_id=settings.mqtt_client_id)
-mqttClient.username_pw_set(settings.mqtt_username, settings.mqtt_password)
-mqttClient.tls_set()
-mqttClient.connect(settings.mqtt_broker_url, settings.mqtt_broker_port, 60)
+logger = logging.getLogger(__name__)
 
+# Transporte paho: solo se configura, la conexión la abre el hilo de red de paho (loop_start)
+def createPahoClient():
+    client = mqtt.Client(client_id=settings.mqtt_client_id)
+    client.username_pw_set(settings.mqtt_username, settings.mqtt_password)
+    client.tls_set()
+    client.connect_async(settings.mqtt_broker_url, settings.mqtt_broker_port, 60)
+    return client
+
+# Transporte sin broker para scripts y entornos locales: acepta las publicaciones y las descarta
+class NullMqttClient:
+    def __init__(self):
+        self.on_connect = None
+        self.on_message = None
+        self.on_disconnect = None
+
+    def reconnect_delay_set(self, min_delay: float = 1, max_delay: float = 120):
+        pass
+
+    def loop_start(self):
+        return mqtt.MQTT_ERR_SUCCESS
+
+    def loop_stop(self):
+        return mqtt.MQTT_ERR_SUCCESS
+
+    def disconnect(self):
+        return mqtt.MQTT_ERR_SUCCESS
+
+    def is_connected(self):
+        return True
+
+    def subscribe(self, topic: str, qos: int = 0):
+        return (mqtt.MQTT_ERR_SUCCESS, None)
+
+    def publish(self, topic: str, payload=None, qos: int = 0, retain: bool = False):
+        logger.debug(f"Transporte MQTT nulo, se descarta el mensaje para {topic}")
+        info = mqtt.MQTTMessageInfo(0)
+        info.rc = mqtt.MQTT_ERR_SUCCESS
+        return info
+
+mqttTransports = {
+    "paho": createPahoClient,
+    "null": NullMqttClient,
+}
+
+def createMqttClient():
+    if settings.mqtt_transport not in mqttTransports:
+        raise ValueError(f"Transporte MQTT desconocido: {settings.mqtt_transport}")
+    return mqttTransports[settings.mqtt_transport]()
@@ -0,0 +1,115 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+import paho.mqtt.client as mqtt
+
+logger = logging.getLogger(__name__)
+
+class MqttConnection:
+    # El loop de red corre en el hilo de paho (loop_start), que serializa las escrituras en el socket
+    # aunque se publique desde otros hilos, y reconecta por sí mismo con backoff exponencial.
+    # Lo que se publica sin conexión se guarda en un buffer acotado y se envía en orden al reconectar;
+    # los mensajes que superan su tiempo de vida se descartan.
+    # El cliente (el transporte) no se crea hasta start(), importar el módulo no abre conexiones.
+    def __init__(self, clientFactory: Callable[[], mqtt.Client], bufferSize: int, messageTtlSeconds: float,
+                 minReconnectDelay: float, maxReconnectDelay: float, stopTimeout: float):
+        self.clientFactory = clientFactory
+        self.client: Optional[mqtt.Client] = None
+        self.messageTtlSeconds = messageTtlSeconds
+        self.minReconnectDelay = minReconnectDelay
+        self.maxReconnectDelay = maxReconnectDelay
+        self.stopTimeout = stopTimeout
+        self.buffer: deque[tuple[float, str, Optional[bytes | str]]] = deque(maxlen=bufferSize)
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.onConnect: Optional[Callable] = None
+        self.hasConnected = False
+        self.published = 0
+        self.buffered = 0
+        self.expired = 0
+        self.overflowed = 0
+        self.reconnects = 0
+
+    def start(self, onConnect: Optional[Callable] = None, onMessage: Optional[Callable] = None):
+        self.onConnect = onConnect
+        if self.client is None:
+            self.client = self.clientFactory()
+        self.client.on_connect = self.handleConnect
+        self.client.on_disconnect = self.handleDisconnect
+        self.client.on_message = onMessage
+        self.client.reconnect_delay_set(min_delay=self.minReconnectDelay, max_delay=self.maxReconnectDelay)
+        self.stopping.clear()
+        # La primera conexión también la hace el hilo de paho, no bloquea el arranque de la aplicación
+        self.client.loop_start()
+
+    def stop(self):
+        if self.client is None:
+            return
+        self.stopping.set()
+        self.client.disconnect()
+        # loop_stop() espera al hilo de red sin límite; se espera desde otro hilo para acotar el apagado
+        stopper = threading.Thread(target=self.client.loop_stop, name="mqtt-stop", daemon=True)
+        stopper.start()
+        stopper.join(timeout=self.stopTimeout)
+        if stopper.is_alive():
+            logger.warning(f"El hilo de red MQTT no terminó en {self.stopTimeout}s, se abandona")
+
+    def handleConnect(self, client, userdata, flags, rc):
+        if rc == 0:
+            if self.hasConnected:
+                self.reconnects += 1
+            self.hasConnected = True
+        if self.onConnect is not None:
+            self.onConnect(client, userdata, flags, rc)
+        if rc == 0:
+            self.flush()
+
+    def handleDisconnect(self, client, userdata, rc):
+        if not self.stopping.is_set():
+            logger.warning("Desconectado del broker MQTT. Intentando reconectar...")
+
+    def publish(self, topic: str, payload: Optional[bytes | str] = None):
+        with self.lock:
+            # Si hay mensajes pendientes se encola detrás de ellos para no alterar el orden
+            if not self.buffer and self.client is not None and self.client.is_connected():
+                if self.client.publish(topic, payload).rc == mqtt.MQTT_ERR_SUCCESS:
+                    self.published += 1
+                    return
+            self.bufferMessage(topic, payload)
+
+    def bufferMessage(self, topic: str, payload: Optional[bytes | str]):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.overflowed += 1
+            logger.warning("Buffer de salida MQTT lleno, se descarta el mensaje más antiguo")
+        self.buffer.append((time.monotonic() + self.messageTtlSeconds, topic, payload))
+        self.buffered += 1
+
+    # Se llama desde el hilo de paho al conectar
+    def flush(self):
+        with self.lock:
+            now = time.monotonic()
+            while self.buffer:
+                expiresAt, topic, payload = self.buffer[0]
+                if expiresAt < now:
+                    self.buffer.popleft()
+                    self.expired += 1
+                    continue
+                if self.client.publish(topic, payload).rc != mqtt.MQTT_ERR_SUCCESS:
+                    # Se volvió a perder la conexión, el resto espera a la siguiente
+                    return
+                self.buffer.popleft()
+                self.published += 1
+
+    def getStatistics(self):
+        return {
+            "connected": self.client is not None and self.client.is_connected(),
+            "buffer_size": self.buffer.maxlen,
+            "buffer_depth": len(self.buffer),
+            "published": self.published,
+            "buffered": self.buffered,
+            "expired": self.expired,
+            "overflowed": self.overflowed,
+            "reconnects": self.reconnects,
+        }
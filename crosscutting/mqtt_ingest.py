@@ -0,0 +1,104 @@
+import asyncio
+import itertools
+import logging
+from typing import Awaitable, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+class MqttIngestPipeline:
+    # Los mensajes llegan por el hilo de red de paho, se decodifican una vez y se encolan en el event loop
+    # sin esperar a la BD; un grupo de workers los procesa. Cada worker tiene su propia cola y los mensajes
+    # con la misma clave (partitionKey, por defecto el topic) van siempre al mismo worker, así se procesan
+    # en el orden de llegada. Si la cola está llena el mensaje se descarta, igual que los que no pasan
+    # el filtro accept (p. ej. robots desconocidos). Cada mensaje lleva su número de llegada, para que
+    # quien lo procese pueda descartar un estado más antiguo que el último aplicado.
+    def __init__(self, maxSize: int, workers: int, drainTimeout: float):
+        self.maxSize = maxSize
+        self.workers = workers
+        self.drainTimeout = drainTimeout
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.queues: list[asyncio.Queue] = []
+        self.handler: Optional[Callable[[str, str, int], Awaitable[None]]] = None
+        self.accept: Optional[Callable[[str], bool]] = None
+        self.partitionKey: Callable[[str], Hashable] = lambda topic: topic
+        self.tasks: list[asyncio.Task] = []
+        self.sequence = itertools.count()
+        self.received = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.processed = 0
+        self.failed = 0
+
+    async def start(self, handler: Callable[[str, str, int], Awaitable[None]], accept: Optional[Callable[[str], bool]] = None,
+                    partitionKey: Optional[Callable[[str], Hashable]] = None):
+        self.loop = asyncio.get_running_loop()
+        self.queues = [asyncio.Queue(maxsize=max(self.maxSize // self.workers, 1)) for _ in range(self.workers)]
+        self.handler = handler
+        self.accept = accept
+        if partitionKey is not None:
+            self.partitionKey = partitionKey
+        self.tasks = [asyncio.create_task(self.work(queue)) for queue in self.queues]
+
+    # Deja de aceptar mensajes y procesa los ya encolados (como mucho drainTimeout segundos) antes de parar
+    async def stop(self):
+        self.loop = None
+        if self.tasks:
+            try:
+                await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in self.queues)), self.drainTimeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Se paran los workers de MQTT con {self.depth()} mensajes sin procesar")
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    # Se llama desde el hilo de red de paho
+    def submit(self, topic: str, payload: bytes):
+        loop = self.loop
+        if loop is None:
+            return
+        if self.accept is not None and not self.accept(topic):
+            # Contador sin lock, solo lo escribe el hilo de red de paho
+            self.rejected += 1
+            return
+        # Solo lo avanza el hilo de red de paho, en el orden en que llegan los mensajes
+        message = (topic, payload.decode(errors="replace"), next(self.sequence))
+        queue = self.queues[hash(self.partitionKey(topic)) % len(self.queues)]
+        try:
+            loop.call_soon_threadsafe(self.enqueue, queue, message)
+        except RuntimeError:
+            # El event loop ya se cerró
+            pass
+
+    def enqueue(self, queue: asyncio.Queue, message: tuple[str, str, int]):
+        self.received += 1
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(f"Cola de MQTT llena, mensaje descartado: {message[0]}")
+
+    async def work(self, queue: asyncio.Queue):
+        while True:
+            topic, payload, sequence = await queue.get()
+            try:
+                await self.handler(topic, payload, sequence)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error al procesar el mensaje de {topic}: {e}")
+            finally:
+                queue.task_done()
+
+    def depth(self):
+        return sum(queue.qsize() for queue in self.queues)
+
+    def getStatistics(self):
+        return {"queue_size": self.maxSize,
+                "queue_depth": self.depth(),
+                "workers": len(self.tasks),
+                "received": self.received,
+                "rejected": self.rejected,
+                "dropped": self.dropped,
+                "processed": self.processed,
+                "failed": self.failed}
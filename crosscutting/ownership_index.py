@@ -0,0 +1,66 @@
+from typing import Any, Awaitable, Callable, Hashable, Optional
+from crosscutting.cache import TTLCache
+
+class OwnershipIndex:
+    # Índice en memoria de los dueños de cada robot, movimiento, grupo de servos y posición.
+    # Cada entrada se carga bajo demanda (una lectura por clave primaria gracias a las columnas
+    # robot_id/user_id desnormalizadas) y se olvida al borrar la entidad. Un índice inverso recuerda
+    # qué entradas cuelgan de cada usuario, robot y movimiento, para olvidar solo esas cuando la BD
+    # las elimina en cascada. Solo se usa desde el event loop.
+    def __init__(self, maxSize: int, ttlSeconds: float):
+        self.owners = {
+            "robot": TTLCache(maxSize, ttlSeconds),       # robotId -> userId
+            "movement": TTLCache(maxSize, ttlSeconds),    # movementId -> (robot_id, user_id)
+            "servoGroup": TTLCache(maxSize, ttlSeconds),  # servoGroupId -> (robot_id, user_id)
+            "position": TTLCache(maxSize, ttlSeconds),    # positionId -> (robot_id, user_id, movement_id)
+        }
+        # ("user", 1) -> {("robot", 3), ("movement", 7), ...}
+        self.dependents: dict[tuple[str, Hashable], set[tuple[str, Hashable]]] = {}
+
+    async def resolve(self, kind: str, key: Hashable, load: Callable[[Hashable], Awaitable[Optional[Any]]]) -> Optional[Any]:
+        owners = self.owners[kind]
+        owner = owners.get(key)
+        if owner is None:
+            owner = await load(key)
+            if owner is not None:
+                owners.set(key, owner)
+                for parent in self.parentsOf(kind, owner):
+                    self.dependents.setdefault(parent, set()).add((kind, key))
+        return owner
+
+    def parentsOf(self, kind: str, owner: Any) -> list[tuple[str, Hashable]]:
+        if kind == "robot":
+            return [("user", owner)]
+        parents = [("user", owner.user_id), ("robot", owner.robot_id)]
+        if kind == "position":
+            parents.append(("movement", owner.movement_id))
+        return parents
+
+    def forget(self, kind: str, key: Hashable):
+        if kind in self.owners:
+            self.owners[kind].invalidate(key)
+        self.forgetDependents(kind, key)
+
+    # Olvida lo que cuelga de la entidad pero no la entidad
+    def forgetDependents(self, kind: str, key: Hashable):
+        for dependentKind, dependentKey in self.dependents.pop((kind, key), ()):
+            self.owners[dependentKind].invalidate(dependentKey)
+            self.dependents.pop((dependentKind, dependentKey), None)
+
+    def forgetUser(self, userId: int):
+        self.forget("user", userId)
+
+    def forgetRobot(self, robotId: int):
+        self.forget("robot", robotId)
+
+    def forgetMovement(self, movementId: int):
+        self.forget("movement", movementId)
+
+    def forgetServoGroup(self, servoGroupId: int):
+        self.forget("servoGroup", servoGroupId)
+
+    def forgetPosition(self, positionId: int):
+        self.forget("position", positionId)
+
+    def forgetPositionsOfMovement(self, movementId: int):
+        self.forgetDependents("movement", movementId)
@@ -0,0 +1,40 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Optional
+
+class PeriodicFlusher(ABC):
+    # Base de los almacenes write-behind: acumulan cambios en memoria y los escriben con flush()
+    # cada flushInterval segundos, y una última vez al parar. Con flushInterval <= 0 no se arranca.
+    def __init__(self, flushInterval: float):
+        self.flushInterval = flushInterval
+        self.task: Optional[asyncio.Task] = None
+        self.stopping: Optional[asyncio.Event] = None
+
+    @property
+    def enabled(self):
+        return self.flushInterval > 0
+
+    @abstractmethod
+    async def flush(self):
+        ...
+
+    async def run(self):
+        while not self.stopping.is_set():
+            try:
+                await asyncio.wait_for(self.stopping.wait(), self.flushInterval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def start(self):
+        if self.enabled and self.task is None:
+            self.stopping = asyncio.Event()
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        # No se cancela la tarea: se le pide que termine, así una escritura en curso no se pierde a medias
+        if self.task is not None:
+            self.stopping.set()
+            await self.task
+            self.task = None
+        await self.flush()
@@ -0,0 +1,35 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class DatabasePoolResponse(BaseModel):
+    pool_class: str
+    size: Optional[int] = None
+    max_overflow: Optional[int] = None
+    checked_in: Optional[int] = None
+    checked_out: Optional[int] = None
+    overflow: Optional[int] = None
+    checkouts: Optional[int] = None
+    timeouts: Optional[int] = None
+    total_wait_ms: Optional[float] = None
+    max_wait_ms: Optional[float] = None
+    avg_wait_ms: Optional[float] = None
+
+class MqttIngestResponse(BaseModel):
+    queue_size: int
+    queue_depth: int
+    workers: int
+    received: int
+    rejected: int
+    dropped: int
+    processed: int
+    failed: int
+
+class MqttOutboundResponse(BaseModel):
+    connected: bool
+    buffer_size: int
+    buffer_depth: int
+    published: int
+    buffered: int
+    expired: int
+    overflowed: int
+    reconnects: int
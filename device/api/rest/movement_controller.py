@@ -19,14 +19,14 @@ router = APIRouter(
 @inject
 async def createMovement(request: CreateMovementRequest,
                          movementService: MovementService = Depends(Provide[Container.movementService])):
-    movement = movementService.create(MovementMapper.createRequestToModel(request))
+    movement = await movementService.create(MovementMapper.createRequestToModel(request))
     return MovementMapper.modelToResponse(movement)
 
 @router.get("/robot/{robotId}", response_model=list[MovementResponse], dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def getAllMovementsByRobotId(robotId: int,
                                    movementService: MovementService = Depends(Provide[Container.movementService])):
-    movements = movementService.getAllByRobotId(robotId)
+    movements = await movementService.getAllByRobotId(robotId)
     return [MovementMapper.modelToResponse(movement) for movement in movements]
 
 # Actualizar movimiento por ID
@@ -35,7 +35,7 @@ async def getAllMovementsByRobotId(robotId: int,
 async def updateMovementById(movementId: int, 
                              request: UpdateMovementRequest,
                              movementService: MovementService = Depends(Provide[Container.movementService])):
-    movement = movementService.update(movementService.getById(movementId), request.name, request.coordinates and request.coordinates.model_dump_json())
+    movement = await movementService.update(await movementService.getById(movementId), request.name, request.coordinates and request.coordinates.model_dump_json())
     return MovementMapper.modelToResponse(movement)
 
 # Eliminar movimiento por ID
@@ -43,4 +43,4 @@ async def updateMovementById(movementId: int,
 @inject
 async def deleteMovementById(movementId: int,
                              movementService: MovementService = Depends(Provide[Container.movementService])):
-    return movementService.delete(movementService.getById(movementId))
\ No newline at end of file
+    return await movementService.delete(await movementService.getById(movementId))
\ No newline at end of file
@@ -1,13 +1,13 @@
-import json
 from fastapi import APIRouter, Depends
 from dependency_injector.wiring import inject, Provide
 from device.mapping.position_mapper import PositionMapper
-from device.resource.request.position_request import CreatePositionRequest, UpdatePositionRequest
+from device.resource.request.position_request import CreatePositionRequest, MovePositionRequest, ReorderPositionsRequest, ReplacePositionsRequest, UpdatePositionRequest
 from device.resource.response.position_response import PositionResponse
 from device.service.position_service import PositionService
 from security.domain.model.user import Role
-from crosscutting.authorization import authorizeRoles
+from crosscutting.authorization import AuthContext, authorizeRoles, getAuthContext
 from core.container import Container
+from security.service.user_service import UserService
 
 # Definir el router con prefijo y etiqueta
 router = APIRouter(
@@ -20,14 +20,38 @@ router = APIRouter(
 @inject
 async def createPosition(request: CreatePositionRequest,
                          positionService: PositionService = Depends(Provide[Container.positionService])):
-    position = positionService.create(PositionMapper.createRequestToModel(request))
+    position = await positionService.create(PositionMapper.createRequestToModel(request))
     return PositionMapper.modelToResponse(position)
 
 @router.get("/movement/{movementId}", response_model=list[PositionResponse], dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def getAllPositionsByMovementId(movementId: int,
                                       positionService: PositionService = Depends(Provide[Container.positionService])):
-    positions = positionService.getAllByMovementId(movementId)
+    positions = await positionService.getAllByMovementId(movementId)
+    return [PositionMapper.modelToResponse(position) for position in positions]
+
+# Crear o reemplazar todas las posiciones de un movimiento en una sola transacción
+@router.put("/movement/{movementId}", response_model=list[PositionResponse], dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
+@inject
+async def replaceAllPositionsByMovementId(movementId: int,
+                                          request: ReplacePositionsRequest,
+                                          authContext: AuthContext = Depends(getAuthContext),
+                                          positionService: PositionService = Depends(Provide[Container.positionService]),
+                                          userService: UserService = Depends(Provide[Container.userService])):
+    await userService.validateMovementAccess(authContext.userId, movementId)
+    positions = await positionService.replaceAllByMovementId(movementId, PositionMapper.replaceRequestToModels(request, movementId))
+    return [PositionMapper.modelToResponse(position) for position in positions]
+
+# Reordenar todas las posiciones de un movimiento en una sola transacción
+@router.put("/movement/{movementId}/reorder", response_model=list[PositionResponse], dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
+@inject
+async def reorderPositionsByMovementId(movementId: int,
+                                       request: ReorderPositionsRequest,
+                                       authContext: AuthContext = Depends(getAuthContext),
+                                       positionService: PositionService = Depends(Provide[Container.positionService]),
+                                       userService: UserService = Depends(Provide[Container.userService])):
+    await userService.validateMovementAccess(authContext.userId, movementId)
+    positions = await positionService.reorder(movementId, request.position_ids)
     return [PositionMapper.modelToResponse(position) for position in positions]
 
 # Incrementar secuencia de posición por ID
@@ -35,7 +59,7 @@ async def getAllPositionsByMovementId(movementId: int,
 @inject
 async def increasePositionSequenceById(positionId: int,
                                        positionService: PositionService = Depends(Provide[Container.positionService])):
-    position = positionService.increaseSequence(positionService.getById(positionId))
+    position = await positionService.increaseSequence(await positionService.getById(positionId))
     return PositionMapper.modelToResponse(position)
 
 # Decrementar secuencia de posición por ID
@@ -43,7 +67,19 @@ async def increasePositionSequenceById(positionId: int,
 @inject
 async def decreasePositionSequenceById(positionId: int,
                                        positionService: PositionService = Depends(Provide[Container.positionService])):
-    position = positionService.decreaseSequence(positionService.getById(positionId))
+    position = await positionService.decreaseSequence(await positionService.getById(positionId))
+    return PositionMapper.modelToResponse(position)
+
+# Mover posición a cualquier secuencia por ID
+@router.put("/{positionId}/move-to", response_model=PositionResponse, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
+@inject
+async def movePositionToSequenceById(positionId: int,
+                                     request: MovePositionRequest,
+                                     authContext: AuthContext = Depends(getAuthContext),
+                                     positionService: PositionService = Depends(Provide[Container.positionService]),
+                                     userService: UserService = Depends(Provide[Container.userService])):
+    await userService.validatePositionAccess(authContext.userId, positionId)
+    position = await positionService.moveToSequence(await positionService.getById(positionId), request.sequence)
     return PositionMapper.modelToResponse(position)
 
 # Actualizar posición por ID
@@ -52,7 +88,7 @@ async def decreasePositionSequenceById(positionId: int,
 async def updatePositionById(positionId: int, 
                              request: UpdatePositionRequest,
                              positionService: PositionService = Depends(Provide[Container.positionService])):
-    position = positionService.update(positionService.getById(positionId), request.delay, json.dumps(request.angles))
+    position = await positionService.update(await positionService.getById(positionId), request.delay, request.angles)
     return PositionMapper.modelToResponse(position)
 
 # Eliminar posición por ID
@@ -60,4 +96,4 @@ async def updatePositionById(positionId: int,
 @inject
 async def deletePositionById(positionId: int,
                              positionService: PositionService = Depends(Provide[Container.positionService])):
-    return positionService.delete(positionService.getById(positionId))
\ No newline at end of file
+    return await positionService.delete(await positionService.getById(positionId))
\ No newline at end of file
@@ -1,13 +1,14 @@
-from fastapi import APIRouter, Depends, File, UploadFile
+from typing import Optional
+from fastapi import APIRouter, Depends, File, Query, UploadFile
 from dependency_injector.wiring import inject, Provide
 from device.mapping.robot_mapper import RobotMapper
 from device.resource.request.robot_request import CreateRobotRequest, UpdateCurrentPositionRequest, UpdateInitialPositionRequest, UpdateRobotRequest
-from device.resource.response.robot_response import RobotResponse, RobotResponseForAll
+from device.resource.response.robot_response import RobotPageResponse, RobotResponse, RobotTreeResponse
 from device.service.movement_service import MovementService
 from device.service.position_service import PositionService
 from device.service.robot_service import RobotService
-from security.domain.model.user import Role, User
-from crosscutting.authorization import authorizeRoles, getAuthenticatedUser
+from security.domain.model.user import Role
+from crosscutting.authorization import AuthContext, authorizeRoles, getAuthContext
 from core.container import Container
 from security.service.user_service import UserService
 
@@ -20,128 +21,142 @@ router = APIRouter(
 @router.get("/uuid/{uniqueUid}", response_model=RobotResponse, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def getRobotByUniqueUid(uniqueUid: str,
-                            authenticatedUser: User = Depends(getAuthenticatedUser), 
+                            authContext: AuthContext = Depends(getAuthContext), 
                             robotService: RobotService = Depends(Provide[Container.robotService]),
                             userService: UserService = Depends(Provide[Container.userService])):
-    robot = robotService.getByUniqueUid(uniqueUid)
-    userService.validateRobotAccess(authenticatedUser.id, robot.id)
+    robot = await robotService.getByUniqueUid(uniqueUid)
+    await userService.validateRobotAccess(authContext.userId, robot.id)
     return RobotMapper.modelToResponse(robot)
 
 @router.get("/my", response_model=list[RobotResponse], dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
-async def getAllRobotsByMy(authenticatedUser: User = Depends(getAuthenticatedUser), 
+async def getAllRobotsByMy(authContext: AuthContext = Depends(getAuthContext), 
                            robotService: RobotService = Depends(Provide[Container.robotService])):
-    robots = robotService.getAllByUserId(authenticatedUser.id)
+    robots = await robotService.getAllByUserId(authContext.userId)
     return [RobotMapper.modelToResponse(robot) for robot in robots]
 
-@router.get("/", response_model=list[RobotResponseForAll], dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
+@router.get("/", response_model=RobotPageResponse, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
-async def getAllRobotsForAll(robotService: RobotService = Depends(Provide[Container.robotService])):
-    robots = robotService.getAll()
-    return [RobotMapper.modelToResponseForAll(robot) for robot in robots]
+async def getAllRobotsForAll(limit: int = Query(50, ge=1, le=200),
+                             afterId: Optional[int] = None,
+                             botname: Optional[str] = None,
+                             isConnectedBroker: Optional[bool] = None,
+                             robotService: RobotService = Depends(Provide[Container.robotService])):
+    robots, nextCursor = await robotService.getPage(limit, afterId, botname, isConnectedBroker)
+    return RobotMapper.modelsToPageResponse(robots, nextCursor)
+
+@router.get("/{robotId}/tree", response_model=RobotTreeResponse, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
+@inject
+async def getRobotTreeById(robotId: int,
+                           authContext: AuthContext = Depends(getAuthContext), 
+                           robotService: RobotService = Depends(Provide[Container.robotService]),
+                           userService: UserService = Depends(Provide[Container.userService])):
+    await userService.validateRobotAccess(authContext.userId, robotId)
+    robot = await robotService.getTreeById(robotId)
+    return RobotMapper.modelToTreeResponse(robot)
 
 @router.post("/", response_model=RobotResponse, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def createRobot(request: CreateRobotRequest, 
-                      authenticatedUser: User = Depends(getAuthenticatedUser), 
+                      authContext: AuthContext = Depends(getAuthContext), 
                       robotService: RobotService = Depends(Provide[Container.robotService])):
-    robot = robotService.create(RobotMapper.createRequestToModel(request, authenticatedUser.id))
+    robot = await robotService.create(RobotMapper.createRequestToModel(request, authContext.userId))
     return RobotMapper.modelToResponse(robot)
 
 @router.put("/{robotId}", response_model=RobotResponse, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def updateRobotById(robotId: int, 
                           request: UpdateRobotRequest, 
-                          authenticatedUser: User = Depends(getAuthenticatedUser), 
+                          authContext: AuthContext = Depends(getAuthContext), 
                           robotService: RobotService = Depends(Provide[Container.robotService]),
                           userService: UserService = Depends(Provide[Container.userService])):
-    userService.validateRobotAccess(authenticatedUser.id, robotId)
-    robot = robotService.update(robotService.getById(robotId), request.botname, request.description)
+    await userService.validateRobotAccess(authContext.userId, robotId)
+    robot = await robotService.update(await robotService.getById(robotId), request.botname, request.description)
     return RobotMapper.modelToResponse(robot)
 
 @router.put("/{robotId}/initial-position", response_model=RobotResponse, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def updateInitialPositionById(robotId: int, 
                                     request: UpdateInitialPositionRequest, 
-                                    authenticatedUser: User = Depends(getAuthenticatedUser), 
+                                    authContext: AuthContext = Depends(getAuthContext), 
                                     robotService: RobotService = Depends(Provide[Container.robotService]),
                                     userService: UserService = Depends(Provide[Container.userService])):
-    userService.validateRobotAccess(authenticatedUser.id, robotId)
-    robot = robotService.updateInitialPosition(robotService.getById(robotId), request.initial_position.model_dump_json())
+    await userService.validateRobotAccess(authContext.userId, robotId)
+    robot = await robotService.updateInitialPosition(await robotService.getById(robotId), request.initial_position.model_dump())
     return RobotMapper.modelToResponse(robot)
 
 @router.put("/{robotId}/image", response_model=RobotResponse, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def updateImageById(robotId: int, 
                           imageFile: UploadFile,
-                          authenticatedUser: User = Depends(getAuthenticatedUser), 
+                          authContext: AuthContext = Depends(getAuthContext), 
                           robotService: RobotService = Depends(Provide[Container.robotService]),
                           userService: UserService = Depends(Provide[Container.userService])):
-    userService.validateRobotAccess(authenticatedUser.id, robotId)
-    robot = robotService.updateImage(robotService.getById(robotId), imageFile)
+    await userService.validateRobotAccess(authContext.userId, robotId)
+    robot = await robotService.updateImage(await robotService.getById(robotId), imageFile)
     return RobotMapper.modelToResponse(robot)
 
 @router.put("/{robotId}/config-image", response_model=RobotResponse, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def updateConfigImageById(robotId: int, 
                                 configImageFile: UploadFile,
-                                authenticatedUser: User = Depends(getAuthenticatedUser), 
+                                authContext: AuthContext = Depends(getAuthContext), 
                                 robotService: RobotService = Depends(Provide[Container.robotService]),
                                 userService: UserService = Depends(Provide[Container.userService])):
-    userService.validateRobotAccess(authenticatedUser.id, robotId)
-    robot = robotService.updateConfigImage(robotService.getById(robotId), configImageFile)
+    await userService.validateRobotAccess(authContext.userId, robotId)
+    robot = await robotService.updateConfigImage(await robotService.getById(robotId), configImageFile)
     return RobotMapper.modelToResponse(robot)
 
 @router.delete("/{robotId}", response_model=bool, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def deleteRobotById(robotId: int, 
-                          authenticatedUser: User = Depends(getAuthenticatedUser), 
+                          authContext: AuthContext = Depends(getAuthContext), 
                           robotService: RobotService = Depends(Provide[Container.robotService]),
                           userService: UserService = Depends(Provide[Container.userService])):
-    userService.validateRobotAccess(authenticatedUser.id, robotId)
-    return robotService.delete(robotService.getById(robotId))
+    await userService.validateRobotAccess(authContext.userId, robotId)
+    return await robotService.delete(await robotService.getById(robotId))
 
 @router.post("/{robotId}/send-positions/initial-position", response_model=RobotResponse, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def moveToInitialPositionById(robotId: int,
-                                    authenticatedUser: User = Depends(getAuthenticatedUser), 
+                                    authContext: AuthContext = Depends(getAuthContext), 
                                     robotService: RobotService = Depends(Provide[Container.robotService]),
                                     userService: UserService = Depends(Provide[Container.userService])):
-    userService.validateRobotAccess(authenticatedUser.id, robotId)
-    robot = robotService.moveToInitialPosition(robotService.getById(robotId))
+    await userService.validateRobotAccess(authContext.userId, robotId)
+    robot = await robotService.moveToInitialPosition(await robotService.getById(robotId))
     return RobotMapper.modelToResponse(robot)
 
 @router.post("/{robotId}/send-positions/current-position", response_model=RobotResponse, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def updateAndMoveToCurrentPositionById(robotId: int, 
                                              newPosition: UpdateCurrentPositionRequest, 
-                                             authenticatedUser: User = Depends(getAuthenticatedUser), 
+                                             authContext: AuthContext = Depends(getAuthContext), 
                                              robotService: RobotService = Depends(Provide[Container.robotService]),
                                              userService: UserService = Depends(Provide[Container.userService])):
-    userService.validateRobotAccess(authenticatedUser.id, robotId)
-    robot = robotService.updateAndMoveToCurrentPosition(robotService.getById(robotId), newPosition.current_position.model_dump_json())
+    await userService.validateRobotAccess(authContext.userId, robotId)
+    robot = await robotService.updateAndMoveToCurrentPosition(await robotService.getById(robotId), newPosition.current_position.model_dump())
     return RobotMapper.modelToResponse(robot)
 
 @router.post("/{robotId}/send-positions/movements/{movementId}", response_model=RobotResponse, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def executeMovementByIdAndYourId(robotId: int, 
                                        movementId: int, 
-                                       authenticatedUser: User = Depends(getAuthenticatedUser), 
+                                       authContext: AuthContext = Depends(getAuthContext), 
                                        robotService: RobotService = Depends(Provide[Container.robotService]),
                                        userService: UserService = Depends(Provide[Container.userService])):
-    userService.validateRobotAccess(authenticatedUser.id, robotId)
-    robot = robotService.executeMovement(robotService.validateMovementAccess(robotId, movementId), movementId)
+    await userService.validateRobotAccess(authContext.userId, robotId)
+    robot = await robotService.executeMovement(await robotService.validateMovementAccess(robotId, movementId), movementId)
     return RobotMapper.modelToResponse(robot)
 
 @router.post("/{robotId}/send-positions/movements/positions/{positionId}", response_model=RobotResponse, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def moveToPositionByIdAndYourId(robotId: int, 
                                       positionId: int, 
-                                      authenticatedUser: User = Depends(getAuthenticatedUser), 
+                                      authContext: AuthContext = Depends(getAuthContext), 
                                       robotService: RobotService = Depends(Provide[Container.robotService]),
                                       userService: UserService = Depends(Provide[Container.userService])):
-    userService.validateRobotAccess(authenticatedUser.id, robotId)
-    robot =  robotService.moveToPosition(robotService.validatePositionAccess(robotId, positionId), positionId)
+    await userService.validateRobotAccess(authContext.userId, robotId)
+    robot =  await robotService.moveToPosition(await robotService.validatePositionAccess(robotId, positionId), positionId)
     return RobotMapper.modelToResponse(robot)
 
 # ---------------- ENDPOINTS TRANSACCIONALES PARA EL ALMACENAMIENTO LOCAL DEL ROBOT-----------------
@@ -149,37 +164,37 @@ async def moveToPositionByIdAndYourId(robotId: int,
 @inject
 async def saveMovementInLocalByIdAndYourId(robotId: int, 
                                   movementId: int,
-                                  authenticatedUser: User = Depends(getAuthenticatedUser), 
+                                  authContext: AuthContext = Depends(getAuthContext), 
                                   robotService: RobotService = Depends(Provide[Container.robotService]),
                                   userService: UserService = Depends(Provide[Container.userService])):
-    userService.validateRobotAccess(authenticatedUser.id, robotId)
-    return robotService.saveMovementInLocal(robotService.validateMovementAccess(robotId, movementId), movementId)
+    await userService.validateRobotAccess(authContext.userId, robotId)
+    return await robotService.saveMovementInLocal(await robotService.validateMovementAccess(robotId, movementId), movementId)
 
 # Eliminar movimiento por ID
 @router.delete("/{robotId}/storage/movements/{movementId}", response_model=bool, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def deleteMovementInLocalByIdAndYourId(robotId: int, 
                                     movementId: int,
-                                    authenticatedUser: User = Depends(getAuthenticatedUser), 
+                                    authContext: AuthContext = Depends(getAuthContext), 
                                     robotService: RobotService = Depends(Provide[Container.robotService]),
                                     userService: UserService = Depends(Provide[Container.userService])):
-    userService.validateRobotAccess(authenticatedUser.id, robotId)
-    return robotService.deleteMovementInLocal(robotService.validateMovementAccess(robotId, movementId), movementId)
+    await userService.validateRobotAccess(authContext.userId, robotId)
+    return await robotService.deleteMovementInLocal(await robotService.validateMovementAccess(robotId, movementId), movementId)
 
 @router.put("/{robotId}/storage/initial-position", response_model=bool, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def saveInitialPositionInLocalById(robotId: int, 
-                                         authenticatedUser: User = Depends(getAuthenticatedUser), 
+                                         authContext: AuthContext = Depends(getAuthContext), 
                                          robotService: RobotService = Depends(Provide[Container.robotService]),
                                          userService: UserService = Depends(Provide[Container.userService])):
-    userService.validateRobotAccess(authenticatedUser.id, robotId)
-    return robotService.saveInitialPositionInLocal(robotService.getById(robotId))
+    await userService.validateRobotAccess(authContext.userId, robotId)
+    return robotService.saveInitialPositionInLocal(await robotService.getById(robotId))
 
 @router.delete("/{robotId}/storage", response_model=bool, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def clearLocalStorageById(robotId: int, 
-                                authenticatedUser: User = Depends(getAuthenticatedUser), 
+                                authContext: AuthContext = Depends(getAuthContext), 
                                 robotService: RobotService = Depends(Provide[Container.robotService]),
                                 userService: UserService = Depends(Provide[Container.userService])):
-    userService.validateRobotAccess(authenticatedUser.id, robotId)
-    return robotService.clearLocalStorage(robotService.getById(robotId))
\ No newline at end of file
+    await userService.validateRobotAccess(authContext.userId, robotId)
+    return robotService.clearLocalStorage(await robotService.getById(robotId))
\ No newline at end of file
@@ -2,12 +2,13 @@ import json
 from fastapi import APIRouter, Depends
 from dependency_injector.wiring import inject, Provide
 from device.mapping.servo_group_mapper import ServoGroupMapper
-from device.resource.request.servo_group_request import CreateServoGroupRequest, UpdateServoGroupNameRequest, UpdateServoGroupNumServosRequest
+from device.resource.request.servo_group_request import CreateServoGroupRequest, MoveServoGroupRequest, ReorderServoGroupsRequest, UpdateServoGroupNameRequest, UpdateServoGroupNumServosRequest
 from device.resource.response.servo_group_response import ServoGroupResponse
 from device.service.servo_group_service import ServoGroupService
 from security.domain.model.user import Role
-from crosscutting.authorization import authorizeRoles
+from crosscutting.authorization import AuthContext, authorizeRoles, getAuthContext
 from core.container import Container
+from security.service.user_service import UserService
 
 # Definir el router con prefijo y etiqueta
 router = APIRouter(
@@ -19,35 +20,57 @@ router = APIRouter(
 @inject
 async def createServoGroup(request: CreateServoGroupRequest,
                            servoGroupService: ServoGroupService = Depends(Provide[Container.servoGroupService])):
-    servoGroup = servoGroupService.create(ServoGroupMapper.createRequestToModel(request))
+    servoGroup = await servoGroupService.create(ServoGroupMapper.createRequestToModel(request))
     return ServoGroupMapper.modelToResponse(servoGroup)
 
 @router.get("/robot/{robotId}", response_model=list[ServoGroupResponse], dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def getAllServoGroupsByRobotId(robotId: int,
                             servoGroupService: ServoGroupService = Depends(Provide[Container.servoGroupService])):
-    servoGroups = servoGroupService.getAllByRobotId(robotId)
+    servoGroups = await servoGroupService.getAllByRobotId(robotId)
+    return [ServoGroupMapper.modelToResponse(servoGroup) for servoGroup in servoGroups]
+
+@router.put("/robot/{robotId}/reorder", response_model=list[ServoGroupResponse], dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
+@inject
+async def reorderServoGroupsByRobotId(robotId: int,
+                                      request: ReorderServoGroupsRequest,
+                                      authContext: AuthContext = Depends(getAuthContext),
+                                      servoGroupService: ServoGroupService = Depends(Provide[Container.servoGroupService]),
+                                      userService: UserService = Depends(Provide[Container.userService])):
+    await userService.validateRobotAccess(authContext.userId, robotId)
+    servoGroups = await servoGroupService.reorder(robotId, request.column, request.servo_group_ids)
     return [ServoGroupMapper.modelToResponse(servoGroup) for servoGroup in servoGroups]
 
 @router.get("/{servoGroupId}", response_model=ServoGroupResponse, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def getServoGroupById(servoGroupId: int,
                             servoGroupService: ServoGroupService = Depends(Provide[Container.servoGroupService])):
-    servoGroup = servoGroupService.getById(servoGroupId)
+    servoGroup = await servoGroupService.getById(servoGroupId)
     return ServoGroupMapper.modelToResponse(servoGroup)
 
 @router.put("/{servoGroupId}/increase", response_model=ServoGroupResponse, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def increaseServoGroupSequenceById(servoGroupId: int,
                                          servoGroupService: ServoGroupService = Depends(Provide[Container.servoGroupService])):
-    servoGroup = servoGroupService.increaseSequence(servoGroupService.getById(servoGroupId))
+    servoGroup = await servoGroupService.increaseSequence(await servoGroupService.getById(servoGroupId))
     return ServoGroupMapper.modelToResponse(servoGroup)
 
 @router.put("/{servoGroupId}/decrease", response_model=ServoGroupResponse, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def decreaseServoGroupSequenceById(servoGroupId: int,
                                          servoGroupService: ServoGroupService = Depends(Provide[Container.servoGroupService])):
-    servoGroup = servoGroupService.decreaseSequence(servoGroupService.getById(servoGroupId))
+    servoGroup = await servoGroupService.decreaseSequence(await servoGroupService.getById(servoGroupId))
+    return ServoGroupMapper.modelToResponse(servoGroup)
+
+@router.put("/{servoGroupId}/move-to", response_model=ServoGroupResponse, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
+@inject
+async def moveServoGroupToSequenceById(servoGroupId: int,
+                                       request: MoveServoGroupRequest,
+                                       authContext: AuthContext = Depends(getAuthContext),
+                                       servoGroupService: ServoGroupService = Depends(Provide[Container.servoGroupService]),
+                                       userService: UserService = Depends(Provide[Container.userService])):
+    await userService.validateServoGroupAccess(authContext.userId, servoGroupId)
+    servoGroup = await servoGroupService.moveToSequence(await servoGroupService.getById(servoGroupId), request.sequence)
     return ServoGroupMapper.modelToResponse(servoGroup)
 
 @router.put("/{servoGroupId}/name", response_model=ServoGroupResponse, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
@@ -55,7 +78,7 @@ async def decreaseServoGroupSequenceById(servoGroupId: int,
 async def updateServoGroupNameById(servoGroupId: int, 
                                    request: UpdateServoGroupNameRequest,
                                    servoGroupService: ServoGroupService = Depends(Provide[Container.servoGroupService])):
-    servoGroup = servoGroupService.updateName(servoGroupService.getById(servoGroupId), request.name)
+    servoGroup = await servoGroupService.updateName(await servoGroupService.getById(servoGroupId), request.name)
     return ServoGroupMapper.modelToResponse(servoGroup)
 
 @router.put("/{servoGroupId}/num-servos", response_model=ServoGroupResponse, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
@@ -63,11 +86,11 @@ async def updateServoGroupNameById(servoGroupId: int,
 async def updateServoGroupNumServosById(servoGroupId: int, 
                                request: UpdateServoGroupNumServosRequest,
                                servoGroupService: ServoGroupService = Depends(Provide[Container.servoGroupService])):
-    servoGroup = servoGroupService.updateNumServos(servoGroupService.getById(servoGroupId), request.num_servos)
+    servoGroup = await servoGroupService.updateNumServos(await servoGroupService.getById(servoGroupId), request.num_servos)
     return ServoGroupMapper.modelToResponse(servoGroup)
 
 @router.delete("/{servoGroupId}", response_model=bool, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def deleteServoGroupById(servoGroupId: int,
                                servoGroupService: ServoGroupService = Depends(Provide[Container.servoGroupService])):
-    return servoGroupService.delete(servoGroupService.getById(servoGroupId))
\ No newline at end of file
+    return await servoGroupService.delete(await servoGroupService.getById(servoGroupId))
\ No newline at end of file
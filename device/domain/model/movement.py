@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 from typing import TYPE_CHECKING, List, Optional
 from sqlmodel import Relationship
@@ -8,15 +9,23 @@ if TYPE_CHECKING:
 
 class Movement(SQLModel, table=True):
     __tablename__ = "movements"
+    __table_args__ = (
+        Index("ix_movements_robot_id_name", "robot_id", "name"),
+        Index("ix_movements_robot_id_coordinates", "robot_id", "coordinates"),
+    )
 
     id: Optional[int] = Field(primary_key=True)
     name: str = Field(nullable=False)
     coordinates: Optional[str] = Field(nullable=True)
     robot_id: Optional[int] = Field(foreign_key="robots.id", nullable=False)
+    # Copia del dueño del robot para comprobar el acceso sin pasar por robots
+    user_id: Optional[int] = Field(default=None, nullable=True, index=True)
+    # Se incrementa con cada cambio en las posiciones, forma parte de la clave de la caché de payloads MQTT
+    payload_version: Optional[int] = Field(default=0, nullable=True)
 
     # Relaciones
     robot: Optional["Robot"] = Relationship(back_populates="movements")
-    positions: List["Position"] = Relationship(back_populates="movement", sa_relationship_kwargs={"cascade": "all, delete-orphan"})
+    positions: List["Position"] = Relationship(back_populates="movement", sa_relationship_kwargs={"cascade": "all, delete-orphan", "order_by": "Position.sequence"})
 
     # coord_x: Optional[int] = Field(nullable=False, default=0)
     # coord_y: Optional[int] = Field(nullable=False, default=0)
\ No newline at end of file
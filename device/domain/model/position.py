@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlmodel import Relationship, SQLModel, Field
 from typing import TYPE_CHECKING, List, Optional
 
@@ -6,12 +7,20 @@ if TYPE_CHECKING:
 
 class Position(SQLModel, table=True):
     __tablename__ = "positions"
+    __table_args__ = (
+        Index("ix_positions_movement_id_sequence", "movement_id", "sequence"),
+    )
 
     id: Optional[int] = Field(primary_key=True)
     delay: int = Field(nullable=False)
     angles: str = Field(nullable=False)
+    # Ángulos empaquetados como uint8 (ver position_angles.py), en ese caso angles queda vacío
+    angles_packed: Optional[bytes] = Field(default=None, nullable=True)
     sequence: Optional[int] = Field(nullable=False)
     movement_id: Optional[int] = Field(foreign_key="movements.id", nullable=False)
+    # Copias del dueño (robot y usuario) para comprobar el acceso sin recorrer movements y robots
+    robot_id: Optional[int] = Field(default=None, nullable=True, index=True)
+    user_id: Optional[int] = Field(default=None, nullable=True, index=True)
 
     # Relaciones
     movement: Optional["Movement"] = Relationship(back_populates="positions")
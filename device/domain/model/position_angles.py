@@ -0,0 +1,25 @@
+import json
+from typing import TYPE_CHECKING
+from core.config import settings
+
+if TYPE_CHECKING:
+    from device.domain.model.position import Position
+
+# Los ángulos van de 0 a 180, así que cada uno cabe en un byte (uint8)
+def packAngles(angles: list[int]) -> bytes:
+    return bytes(angles)
+
+def unpackAngles(packed: bytes) -> list[int]:
+    return list(packed)
+
+# Columnas de Position para unos ángulos, en binario o en JSON según la configuración
+def dumpAngles(angles: list[int]) -> dict:
+    if settings.position_angles_binary:
+        return {"angles": "", "angles_packed": packAngles(angles)}
+    return {"angles": json.dumps(angles), "angles_packed": None}
+
+# Se leen los dos formatos, las filas antiguas pueden seguir en JSON
+def loadAngles(position: "Position") -> list[int]:
+    if position.angles_packed is not None:
+        return unpackAngles(position.angles_packed)
+    return json.loads(position.angles)
@@ -17,4 +17,8 @@ class PositionJson(BaseModel):
         return value
 
 def loadPosition(position: str) -> PositionJson:
-    return PositionJson(**json.loads(position))
\ No newline at end of file
+    return PositionJson(**json.loads(position))
+
+# Para posiciones leídas de la BD, que ya se validaron al guardarse
+def constructPosition(position: dict) -> PositionJson:
+    return PositionJson.model_construct(**position)
\ No newline at end of file
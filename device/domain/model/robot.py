@@ -1,4 +1,6 @@
 from datetime import datetime, timezone
+from sqlalchemy import JSON, Column
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlmodel import Relationship, SQLModel, Field
 from typing import TYPE_CHECKING, List, Optional
 
@@ -17,14 +19,16 @@ class Robot(SQLModel, table=True):
     description: str = Field(nullable=False)
     image_url: Optional[str] = Field(nullable=True)
     config_image_url: Optional[str] = Field(nullable=True)
-    initial_position: Optional[str] = Field(nullable=True)
-    current_position: Optional[str] = Field(nullable=True)
+    # JSON nativo ({"delay": ..., "angles": [...]}), JSONB en PostgreSQL
+    initial_position: Optional[dict] = Field(default=None, sa_column=Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True))
+    current_position: Optional[dict] = Field(default=None, sa_column=Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True))
     is_connected_broker: Optional[bool] = Field(nullable=False, default=False)
+    last_status_change_at: Optional[datetime] = Field(default=None, nullable=True)
     created_at: Optional[datetime] = Field(nullable=False, default_factory=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
-    user_id: Optional[int] = Field(foreign_key="users.id", nullable=False)
+    user_id: Optional[int] = Field(foreign_key="users.id", nullable=False, index=True)
     
     
     # Relaciones
     user: Optional["User"] = Relationship(back_populates="robots")
-    servo_groups: List["ServoGroup"] = Relationship(back_populates="robot", sa_relationship_kwargs={"cascade": "all, delete-orphan"})
-    movements: List["Movement"] = Relationship(back_populates="robot", sa_relationship_kwargs={"cascade": "all, delete-orphan"})
\ No newline at end of file
+    servo_groups: List["ServoGroup"] = Relationship(back_populates="robot", sa_relationship_kwargs={"cascade": "all, delete-orphan", "order_by": "[ServoGroup.column, ServoGroup.sequence]"})
+    movements: List["Movement"] = Relationship(back_populates="robot", sa_relationship_kwargs={"cascade": "all, delete-orphan", "order_by": "Movement.id"})
\ No newline at end of file
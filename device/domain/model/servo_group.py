@@ -1,4 +1,5 @@
 from enum import Enum
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, TYPE_CHECKING
 
@@ -12,6 +13,10 @@ class Column(str, Enum):
 
 class ServoGroup(SQLModel, table=True):
     __tablename__ = "servo_groups"
+    __table_args__ = (
+        Index("ix_servo_groups_robot_id_column_sequence", "robot_id", "column", "sequence"),
+        Index("ix_servo_groups_robot_id_name", "robot_id", "name"),
+    )
 
     id: Optional[int] = Field(primary_key=True)
     name: str = Field(nullable=False)
@@ -19,6 +24,8 @@ class ServoGroup(SQLModel, table=True):
     column: Column = Field(nullable=False)
     sequence: Optional[int] = Field(nullable=False)
     robot_id: Optional[int] = Field(foreign_key="robots.id", nullable=False)
+    # Copia del dueño del robot para comprobar el acceso sin pasar por robots
+    user_id: Optional[int] = Field(default=None, nullable=True, index=True)
 
     # Relaciones
     robot: Optional["Robot"] = Relationship(back_populates="servo_groups")
@@ -1,5 +1,6 @@
 from typing import List, Optional
-from sqlmodel import select
+from sqlalchemy import Row, update
+from sqlmodel import func, select
 from device.domain.model.movement import Movement
 from core.database import getSession
 from core.base_repository import BaseRepository
@@ -11,19 +12,44 @@ class MovementRepository(BaseRepository[Movement]):
     def __init__(self):
         super().__init__(Movement)  # Pasa el modelo Movement al BaseRepository
         
-    def findAllByRobotId(self, robotId: int) -> List[Movement]:
-        with getSession() as session:
+    async def findAllByRobotId(self, robotId: int) -> List[Movement]:
+        async with getSession() as session:
             statement = select(Movement).where(Movement.robot_id == robotId)
-            return session.exec(statement).all()
+            return (await session.exec(statement)).all()
         
-    def findByRobotIdAndName(self, robotId: int, movementName: str) -> Optional[Movement]:
-        with getSession() as session:
+    async def countByRobotId(self, robotId: int) -> int:
+        async with getSession() as session:
+            statement = select(func.count()).select_from(Movement).where(Movement.robot_id == robotId)
+            return (await session.exec(statement)).one()
+        
+    async def findByRobotIdAndName(self, robotId: int, movementName: str) -> Optional[Movement]:
+        async with getSession() as session:
             statement = select(Movement).where((Movement.robot_id == robotId) & 
                                                (Movement.name == movementName)).order_by(Movement.id)
-            return session.exec(statement).first()
+            return (await session.exec(statement)).first()
         
-    def findByIdAndCoordinates(self, robotId: int, coordinates: str) -> Optional[Movement]:
-        with getSession() as session:
+    async def findByIdAndCoordinates(self, robotId: int, coordinates: str) -> Optional[Movement]:
+        async with getSession() as session:
             statement = select(Movement).where((Movement.robot_id == robotId) &
                                                 (Movement.coordinates == coordinates))
-            return session.exec(statement).first()
\ No newline at end of file
+            return (await session.exec(statement)).first()
+        
+    # Robot y usuario dueños del movimiento, con una sola lectura por clave primaria
+    async def findOwnerIdsById(self, movementId: int) -> Optional[Row]:
+        async with getSession() as session:
+            statement = select(Movement.robot_id, Movement.user_id).where(Movement.id == movementId)
+            return (await session.exec(statement)).first()
+    
+    # None si el movimiento no existe, 0 para los movimientos anteriores a la columna
+    async def findPayloadVersionById(self, movementId: int) -> Optional[int]:
+        async with getSession() as session:
+            statement = select(func.coalesce(Movement.payload_version, 0)).where(Movement.id == movementId)
+            return (await session.exec(statement)).first()
+    
+    async def incrementPayloadVersion(self, movementId: int):
+        async with getSession() as session:
+            statement = (update(Movement)
+                         .where(Movement.id == movementId)
+                         .values(payload_version=func.coalesce(Movement.payload_version, 0) + 1)
+                         .execution_options(synchronize_session=False))
+            await session.exec(statement)
@@ -1,5 +1,8 @@
 from typing import Optional
-from sqlmodel import select
+from sqlalchemy import Row, case, delete, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import func, select
 from core.base_repository import BaseRepository
 from device.domain.model.movement import Movement
 from device.domain.model.position import Position
@@ -17,46 +20,92 @@ class PositionRepository(BaseRepository[Position]):
     #                                            (Position.sequence == sequence))
     #         return session.exec(statement).first()
         
-    def findAllByMovementId(self, movementId: int) -> list[Position]:
-        with getSession() as session:
+    async def findAllByMovementId(self, movementId: int) -> list[Position]:
+        async with getSession() as session:
             statement = select(Position).where(Position.movement_id == movementId).order_by(Position.sequence)
-            return session.exec(statement).all()
+            return (await session.exec(statement)).all()
         
-    def findMaxSequenceByMovementId(self, movementId: int) -> int:
-        with getSession() as session:
+    # Robot y usuario dueños de la posición, con una sola lectura por clave primaria
+    async def findOwnerIdsById(self, positionId: int) -> Optional[Row]:
+        async with getSession() as session:
+            statement = select(Position.robot_id, Position.user_id, Position.movement_id).where(Position.id == positionId)
+            return (await session.exec(statement)).first()
+        
+    async def countByMovementId(self, movementId: int) -> int:
+        async with getSession() as session:
+            statement = select(func.count()).select_from(Position).where(Position.movement_id == movementId)
+            return (await session.exec(statement)).one()
+        
+    async def findMaxSequenceByMovementId(self, movementId: int) -> int:
+        async with getSession() as session:
             statement = select(Position.sequence).where(Position.movement_id == movementId).order_by(Position.sequence.desc()).limit(1)
-            max_sequence = session.exec(statement).first()
+            max_sequence = (await session.exec(statement)).first()
             return max_sequence if max_sequence else 0
 
-    def decrementSequenceAfter(self, position: Position):
-        with getSession() as session:
-            statement = select(Position).where(Position.sequence > position.sequence, Position.movement_id == position.movement_id)
-            positions = session.exec(statement).all()
-            for position in positions:
-                position.sequence -= 1
-                session.add(position)
-            session.commit()
+    async def decrementSequenceAfter(self, position: Position):
+        async with getSession() as session:
+            statement = (update(Position)
+                         .where(Position.movement_id == position.movement_id, Position.sequence > position.sequence)
+                         .values(sequence=Position.sequence - 1)
+                         .execution_options(synchronize_session=False))
+            await session.exec(statement)
+
+    async def increaseSequence(self, position: Position) -> Position:
+        return await self.moveToSequence(position, position.sequence + 1)
+
+    async def decreaseSequence(self, position: Position) -> Position:
+        return await self.moveToSequence(position, position.sequence - 1)
 
-    def increaseSequence(self, position: Position) -> Position:
-        with getSession() as session:
-            nextPosition = session.exec(select(Position).where(Position.movement_id == position.movement_id, Position.sequence == position.sequence + 1)).first()
-            if nextPosition:
-                nextPosition.sequence, position.sequence = position.sequence, nextPosition.sequence
-                session.add(position)
-                session.add(nextPosition)
-                session.commit()
-                session.refresh(position)
-                session.refresh(nextPosition)
+    # Mueve la posición a la secuencia destino desplazando el rango intermedio en un solo UPDATE
+    async def moveToSequence(self, position: Position, targetSequence: int) -> Position:
+        if targetSequence == position.sequence:
             return position
+        
+        shift = 1 if targetSequence < position.sequence else -1
+        lowSequence, highSequence = sorted((position.sequence, targetSequence))
+        async with getSession() as session:
+            statement = (update(Position)
+                         .where(Position.movement_id == position.movement_id,
+                                Position.sequence.between(lowSequence, highSequence))
+                         .values(sequence=case((Position.sequence == position.sequence, targetSequence),
+                                               else_=Position.sequence + shift))
+                         .execution_options(synchronize_session=False))
+            await session.exec(statement)
+            set_committed_value(position, "sequence", targetSequence)
+            return position
+
+    # Asigna las secuencias 1..n según el orden de la lista en un solo UPDATE
+    async def reorder(self, positions: list[Position]) -> list[Position]:
+        if not positions:
+            return positions
+        
+        sequences = {position.id: sequence for sequence, position in enumerate(positions, start=1)}
+        async with getSession() as session:
+            statement = (update(Position)
+                         .where(Position.movement_id == positions[0].movement_id,
+                                Position.id.in_(list(sequences)))
+                         .values(sequence=case(sequences, value=Position.id))
+                         .execution_options(synchronize_session=False))
+            await session.exec(statement)
+            for position in positions:
+                set_committed_value(position, "sequence", sequences[position.id])
+            return positions
 
-    def decreaseSequence(self, position: Position) -> Position:
-        with getSession() as session:
-            prevPosition = session.exec(select(Position).where(Position.movement_id == position.movement_id, Position.sequence == position.sequence - 1)).first()
-            if prevPosition:
-                prevPosition.sequence, position.sequence = position.sequence, prevPosition.sequence
-                session.add(position)
-                session.add(prevPosition)
-                session.commit()
-                session.refresh(position)
-                session.refresh(prevPosition)
-            return position
\ No newline at end of file
+    # Reemplaza todas las posiciones del movimiento: un DELETE, un INSERT de varias filas y la lectura del resultado
+    async def replaceAllByMovementId(self, movementId: int, positions: list[Position]) -> list[Position]:
+        async with getSession() as session:
+            try:
+                await session.exec(delete(Position)
+                                   .where(Position.movement_id == movementId)
+                                   .execution_options(synchronize_session=False))
+                if positions:
+                    await session.exec(insert(Position), params=[{"delay": position.delay,
+                                                                  "angles": position.angles,
+                                                                  "angles_packed": position.angles_packed,
+                                                                  "sequence": position.sequence,
+                                                                  "movement_id": movementId,
+                                                                  "robot_id": position.robot_id,
+                                                                  "user_id": position.user_id} for position in positions])
+            except IntegrityError as e:
+                raise ValueError(self.ParseIntegrityError(e))
+        return await self.findAllByMovementId(movementId)
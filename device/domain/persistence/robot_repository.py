@@ -1,5 +1,8 @@
+from datetime import datetime
 from typing import Optional
-from sqlmodel import select
+from sqlalchemy import Row, bindparam, update
+from sqlalchemy.orm import selectinload
+from sqlmodel import func, select
 from core.base_repository import BaseRepository
 from device.domain.model.movement import Movement
 from device.domain.model.position import Position
@@ -12,41 +15,93 @@ class RobotRepository(BaseRepository[Robot]):
     def __init__(self):
         super().__init__(Robot)  # Pasa el modelo Robot al BaseRepository
 
-    def findByUniqueUid(self, uniqueUid: str) -> Optional[Robot]:
-        with getSession() as session:
+    async def findByUniqueUid(self, uniqueUid: str) -> Optional[Robot]:
+        async with getSession() as session:
             statement = select(Robot).where(Robot.unique_uid == uniqueUid)
-            return session.exec(statement).first()
+            return (await session.exec(statement)).first()
         
-    def findByBotname(self, botname: str) -> Optional[Robot]:
-        with getSession() as session:
+    async def findByBotname(self, botname: str) -> Optional[Robot]:
+        async with getSession() as session:
             statement = select(Robot).where(Robot.botname == botname)
-            return session.exec(statement).first()
+            return (await session.exec(statement)).first()
         
-    def findAllByUserId(self, userId: int) -> list[Robot]:
-        with getSession() as session:
+    async def findAllByUserId(self, userId: int) -> list[Robot]:
+        async with getSession() as session:
             statement = select(Robot).where(Robot.user_id == userId).order_by(Robot.id)
-            return session.exec(statement).all()
+            return (await session.exec(statement)).all()
     
-    # Metodos para obtener padre por hijos       
-    def findByServoGroupId(self, servoGroupId: int) -> Optional[Robot]:
-        with getSession() as session:
+    # Solo las columnas del índice unique_uid -> robot, como filas y no como objetos del ORM
+    async def findUniqueUidsAfterId(self, robotId: int) -> list[Row]:
+        async with getSession() as session:
+            statement = select(Robot.unique_uid, Robot.id, Robot.user_id).where(Robot.id > robotId)
+            return (await session.exec(statement)).all()
+    
+    # Un solo UPDATE por lotes (executemany) con la última posición de cada robot
+    async def updateCurrentPositions(self, positions: dict[int, dict]):
+        async with getSession() as session:
+            table = Robot.__table__
+            statement = (update(table)
+                         .where(table.c.id == bindparam("robot_id"))
+                         .values(current_position=bindparam("position")))
+            await session.exec(statement, params=[{"robot_id": robotId, "position": position} for robotId, position in positions.items()])
+    
+    # Un UPDATE para todos los robots que pasan al mismo estado, solo cambian las filas con otro estado
+    async def updateConnectionStatusByUniqueUids(self, uniqueUids: list[str], isConnected: bool, changedAt: datetime):
+        async with getSession() as session:
+            statement = (update(Robot)
+                         .where(Robot.unique_uid.in_(uniqueUids), Robot.is_connected_broker != isConnected)
+                         .values(is_connected_broker=isConnected, last_status_change_at=changedAt)
+                         .execution_options(synchronize_session=False))
+            await session.exec(statement)
+    
+    # Paginación por cursor (id del último robot de la página anterior)
+    # Solo se leen las columnas de RobotResponseForAll, como filas y no como objetos del ORM
+    async def findPage(self, limit: int, afterId: Optional[int] = None, 
+                       botnamePrefix: Optional[str] = None, isConnectedBroker: Optional[bool] = None) -> list[Row]:
+        async with getSession() as session:
+            statement = select(Robot.id, Robot.botname, Robot.description, Robot.image_url, Robot.is_connected_broker)
+            if afterId is not None:
+                statement = statement.where(Robot.id > afterId)
+            if botnamePrefix:
+                statement = statement.where(Robot.botname.startswith(botnamePrefix, autoescape=True))
+            if isConnectedBroker is not None:
+                statement = statement.where(Robot.is_connected_broker == isConnectedBroker)
+            return (await session.exec(statement.order_by(Robot.id).limit(limit))).all()
+        
+    async def countByUserId(self, userId: int) -> int:
+        async with getSession() as session:
+            statement = select(func.count()).select_from(Robot).where(Robot.user_id == userId)
+            return (await session.exec(statement)).one()
+    
+    # Robot con sus grupos de servos, movimientos y posiciones en un número fijo de consultas
+    async def findTreeById(self, robotId: int) -> Optional[Robot]:
+        async with getSession() as session:
+            statement = (select(Robot)
+                        .where(Robot.id == robotId)
+                        .options(selectinload(Robot.servo_groups),
+                                 selectinload(Robot.movements).selectinload(Movement.positions)))
+            return (await session.exec(statement)).first()
+    
+    # Metodos para obtener padre por hijos
+       
+    async def findByServoGroupId(self, servoGroupId: int) -> Optional[Robot]:
+        async with getSession() as session:
             statement = (select(Robot)
                         .join(ServoGroup, ServoGroup.robot_id == Robot.id)
                         .where(ServoGroup.id == servoGroupId))
-            return session.exec(statement).first()
+            return (await session.exec(statement)).first()
              
-    def findByMovementId(self, movementId: int) -> Optional[Robot]:
-        with getSession() as session:
+    async def findByMovementId(self, movementId: int) -> Optional[Robot]:
+        async with getSession() as session:
             statement = (select(Robot)
                         .join(Movement, Movement.robot_id == Robot.id)
                         .where(Movement.id == movementId))
-            return session.exec(statement).first()
+            return (await session.exec(statement)).first()
         
-    def findByPositionId(self, positionId: int) -> Optional[Robot]:
-        with getSession() as session:
+    async def findByPositionId(self, positionId: int) -> Optional[Robot]:
+        async with getSession() as session:
             statement = (select(Robot)
-                        .join(Movement, Movement.robot_id == Robot.id)
-                        .join(Position, Position.movement_id == Movement.id)
+                        .join(Position, Position.robot_id == Robot.id)
                         .where(Position.id == positionId))
-            return session.exec(statement).first()
+            return (await session.exec(statement)).first()
     
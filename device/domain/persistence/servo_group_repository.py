@@ -1,5 +1,7 @@
 from typing import List, Optional
-from sqlmodel import select
+from sqlalchemy import Row, case, update
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import func, select
 from core.database import getSession
 from core.base_repository import BaseRepository
 from device.domain.model.robot import Robot
@@ -10,63 +12,85 @@ class ServoGroupRepository(BaseRepository[ServoGroup]):
     def __init__(self):
         super().__init__(ServoGroup)  # Pasa el modelo Movement al BaseRepository
         
-    def findAllByRobotId(self, robotId: int) -> List[ServoGroup]:
-        with getSession() as session:
+    async def findAllByRobotId(self, robotId: int) -> List[ServoGroup]:
+        async with getSession() as session:
             statement = select(ServoGroup).where(ServoGroup.robot_id == robotId).order_by(ServoGroup.column,
                                                                                           ServoGroup.sequence)
-            return session.exec(statement).all()
+            return (await session.exec(statement)).all()
         
-    def findByRobotIdAndName(self, robotId: int, servoGroupName: str) -> Optional[ServoGroup]:
-        with getSession() as session:
+    # Robot y usuario dueños del grupo, con una sola lectura por clave primaria
+    async def findOwnerIdsById(self, servoGroupId: int) -> Optional[Row]:
+        async with getSession() as session:
+            statement = select(ServoGroup.robot_id, ServoGroup.user_id).where(ServoGroup.id == servoGroupId)
+            return (await session.exec(statement)).first()
+        
+    async def sumNumServosByRobotId(self, robotId: int) -> int:
+        async with getSession() as session:
+            statement = select(func.coalesce(func.sum(ServoGroup.num_servos), 0)).where(ServoGroup.robot_id == robotId)
+            return (await session.exec(statement)).one()
+        
+    async def findByRobotIdAndName(self, robotId: int, servoGroupName: str) -> Optional[ServoGroup]:
+        async with getSession() as session:
             statement = select(ServoGroup).where((ServoGroup.robot_id == robotId) & 
                                                  (ServoGroup.name == servoGroupName))
-            return session.exec(statement).first()
+            return (await session.exec(statement)).first()
         
     # para ordenar secuencia
-    def findMaxSequenceByRobotIdAndColumn(self, robotId: int, column: Column) -> int:
-        with getSession() as session:
+    async def findMaxSequenceByRobotIdAndColumn(self, robotId: int, column: Column) -> int:
+        async with getSession() as session:
             statement = select(ServoGroup.sequence).where((ServoGroup.robot_id == robotId) &
                                                           (ServoGroup.column == column)).order_by(ServoGroup.sequence.desc()).limit(1)
-            max_sequence = session.exec(statement).first()
+            max_sequence = (await session.exec(statement)).first()
             return max_sequence if max_sequence else 0
 
-    def decrementSequenceAfter(self, servoGroup: ServoGroup):
-        with getSession() as session:
-            statement = select(ServoGroup).where((ServoGroup.robot_id == servoGroup.robot_id) & 
-                                                 (ServoGroup.column == servoGroup.column) &
-                                                 (ServoGroup.sequence > servoGroup.sequence))
-            servoGroups = session.exec(statement).all()
-            for existingServoGroup in servoGroups:
-                existingServoGroup.sequence -= 1
-                session.add(existingServoGroup)
-            session.commit()
+    async def decrementSequenceAfter(self, servoGroup: ServoGroup):
+        async with getSession() as session:
+            statement = (update(ServoGroup)
+                         .where((ServoGroup.robot_id == servoGroup.robot_id) & 
+                                (ServoGroup.column == servoGroup.column) &
+                                (ServoGroup.sequence > servoGroup.sequence))
+                         .values(sequence=ServoGroup.sequence - 1)
+                         .execution_options(synchronize_session=False))
+            await session.exec(statement)
+
+    async def increaseSequence(self, servoGroup: ServoGroup) -> ServoGroup:
+        return await self.moveToSequence(servoGroup, servoGroup.sequence + 1)
+
+    async def decreaseSequence(self, servoGroup: ServoGroup) -> ServoGroup:
+        return await self.moveToSequence(servoGroup, servoGroup.sequence - 1)
 
-    def increaseSequence(self, servoGroup: ServoGroup) -> ServoGroup:
-        with getSession() as session:
-            statement = select(ServoGroup).where((ServoGroup.robot_id == servoGroup.robot_id) & 
-                                                 (ServoGroup.column == servoGroup.column) &
-                                                 (ServoGroup.sequence == servoGroup.sequence + 1))
-            nextPosition = session.exec(statement).first()
-            if nextPosition:
-                nextPosition.sequence, servoGroup.sequence = servoGroup.sequence, nextPosition.sequence
-                session.add(servoGroup)
-                session.add(nextPosition)
-                session.commit()
-                session.refresh(servoGroup)
-                session.refresh(nextPosition)
+    # Mueve el grupo a la secuencia destino de su columna desplazando el rango intermedio en un solo UPDATE
+    async def moveToSequence(self, servoGroup: ServoGroup, targetSequence: int) -> ServoGroup:
+        if targetSequence == servoGroup.sequence:
+            return servoGroup
+        
+        shift = 1 if targetSequence < servoGroup.sequence else -1
+        lowSequence, highSequence = sorted((servoGroup.sequence, targetSequence))
+        async with getSession() as session:
+            statement = (update(ServoGroup)
+                         .where((ServoGroup.robot_id == servoGroup.robot_id) & 
+                                (ServoGroup.column == servoGroup.column) &
+                                (ServoGroup.sequence.between(lowSequence, highSequence)))
+                         .values(sequence=case((ServoGroup.sequence == servoGroup.sequence, targetSequence),
+                                               else_=ServoGroup.sequence + shift))
+                         .execution_options(synchronize_session=False))
+            await session.exec(statement)
+            set_committed_value(servoGroup, "sequence", targetSequence)
             return servoGroup
 
-    def decreaseSequence(self, servoGroup: ServoGroup) -> ServoGroup:
-        with getSession() as session:
-            statement = select(ServoGroup).where((ServoGroup.robot_id == servoGroup.robot_id) & 
-                                                 (ServoGroup.column == servoGroup.column) &
-                                                 (ServoGroup.sequence == servoGroup.sequence - 1))
-            prevPosition = session.exec(statement).first()
-            if prevPosition:
-                prevPosition.sequence, servoGroup.sequence = servoGroup.sequence, prevPosition.sequence
-                session.add(servoGroup)
-                session.add(prevPosition)
-                session.commit()
-                session.refresh(servoGroup)
-                session.refresh(prevPosition)
-            return servoGroup
\ No newline at end of file
+    # Asigna las secuencias 1..n de una columna según el orden de la lista en un solo UPDATE
+    async def reorder(self, servoGroups: List[ServoGroup]) -> List[ServoGroup]:
+        if not servoGroups:
+            return servoGroups
+        
+        sequences = {servoGroup.id: sequence for sequence, servoGroup in enumerate(servoGroups, start=1)}
+        async with getSession() as session:
+            statement = (update(ServoGroup)
+                         .where((ServoGroup.robot_id == servoGroups[0].robot_id) &
+                                (ServoGroup.id.in_(list(sequences))))
+                         .values(sequence=case(sequences, value=ServoGroup.id))
+                         .execution_options(synchronize_session=False))
+            await session.exec(statement)
+            for servoGroup in servoGroups:
+                set_committed_value(servoGroup, "sequence", sequences[servoGroup.id])
+            return servoGroups
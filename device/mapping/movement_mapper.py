@@ -1,7 +1,8 @@
 from device.domain.model.coordinates_json import loadCoordinates
 from device.domain.model.movement import Movement
 from device.resource.request.movement_request import CreateMovementRequest, UpdateMovementRequest
-from device.resource.response.movement_response import MovementResponse
+from device.mapping.position_mapper import PositionMapper
+from device.resource.response.movement_response import MovementResponse, MovementTreeResponse
 
 class MovementMapper:
     @staticmethod
@@ -15,3 +16,10 @@ class MovementMapper:
         return MovementResponse(id=request.id, 
                                 name=request.name,
                                 coordinates=request.coordinates and loadCoordinates(request.coordinates))
+    
+    @staticmethod
+    def modelToTreeResponse(movement: Movement) -> MovementTreeResponse:
+        return MovementTreeResponse(id=movement.id, 
+                                    name=movement.name,
+                                    coordinates=movement.coordinates and loadCoordinates(movement.coordinates),
+                                    positions=[PositionMapper.modelToResponse(position) for position in movement.positions])
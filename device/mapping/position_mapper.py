@@ -1,18 +1,24 @@
-import json
 from device.domain.model.position import Position
-from device.resource.request.position_request import CreatePositionRequest, UpdatePositionRequest
+from device.domain.model.position_angles import dumpAngles, loadAngles
+from device.resource.request.position_request import CreatePositionRequest, ReplacePositionsRequest, UpdatePositionRequest
 from device.resource.response.position_response import PositionResponse
 
 class PositionMapper:
     @staticmethod
     def createRequestToModel(request: CreatePositionRequest) -> Position:
         return Position(delay=request.delay, 
-                        angles=json.dumps(request.angles), 
+                        **dumpAngles(request.angles), 
                         movement_id=request.movement_id)
     
+    @staticmethod
+    def replaceRequestToModels(request: ReplacePositionsRequest, movementId: int) -> list[Position]:
+        return [Position(delay=position.delay, 
+                         **dumpAngles(position.angles), 
+                         movement_id=movementId) for position in request.positions]
+    
     @staticmethod
     def modelToResponse(position: Position) -> PositionResponse:
         return PositionResponse(id=position.id, 
                                 sequence=position.sequence, 
                                 delay=position.delay, 
-                                angles=json.loads(position.angles))
+                                angles=loadAngles(position))
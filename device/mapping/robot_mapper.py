@@ -1,8 +1,12 @@
+from typing import Optional
+from sqlalchemy import Row
 import uuid
 from device.domain.model.robot import Robot
-from device.domain.model.position_json import loadPosition
+from device.domain.model.position_json import constructPosition
 from device.resource.request.robot_request import CreateRobotRequest
-from device.resource.response.robot_response import RobotResponse, RobotResponseForAll
+from device.mapping.movement_mapper import MovementMapper
+from device.mapping.servo_group_mapper import ServoGroupMapper
+from device.resource.response.robot_response import RobotPageResponse, RobotResponse, RobotResponseForAll, RobotTreeResponse
 
 class RobotMapper:
     @staticmethod
@@ -20,14 +24,26 @@ class RobotMapper:
                              description=robot.description,
                              image_url=robot.image_url,
                              config_image_url=robot.config_image_url,
-                             initial_position=robot.initial_position and loadPosition(robot.initial_position),
-                             current_position=robot.current_position and loadPosition(robot.current_position),
+                             initial_position=robot.initial_position and constructPosition(robot.initial_position),
+                             current_position=robot.current_position and constructPosition(robot.current_position),
                              is_connected_broker=robot.is_connected_broker)
     
     @staticmethod
-    def modelToResponseForAll(robot: Robot) -> RobotResponse:
+    def modelToTreeResponse(robot: Robot) -> RobotTreeResponse:
+        return RobotTreeResponse(**RobotMapper.modelToResponse(robot).model_dump(),
+                                 servo_groups=[ServoGroupMapper.modelToResponse(servoGroup) for servoGroup in robot.servo_groups],
+                                 movements=[MovementMapper.modelToTreeResponse(movement) for movement in robot.movements])
+    
+    # Fila de la proyección de RobotRepository.findPage, no una instancia de Robot
+    @staticmethod
+    def modelToResponseForAll(robot: Row) -> RobotResponseForAll:
         return RobotResponseForAll(id=robot.id, 
                                    botname=robot.botname,
                                    description=robot.description,
                                    image_url=robot.image_url,
-                                   is_connected_broker=robot.is_connected_broker)
\ No newline at end of file
+                                   is_connected_broker=robot.is_connected_broker)
+    
+    @staticmethod
+    def modelsToPageResponse(robots: list[Row], nextCursor: Optional[int]) -> RobotPageResponse:
+        return RobotPageResponse(items=[RobotMapper.modelToResponseForAll(robot) for robot in robots],
+                                 next_cursor=nextCursor)
@@ -25,3 +25,12 @@ class UpdatePositionRequest(BaseModel):
         if any(not 0 <= angle <= 180 for angle in value):
             raise ValueError('Each angle must be between 0 and 180.')
         return value
+
+class MovePositionRequest(BaseModel):
+    sequence: int = Field(..., ge=1)
+
+class ReorderPositionsRequest(BaseModel):
+    position_ids: List[int]
+
+class ReplacePositionsRequest(BaseModel):
+    positions: List[UpdatePositionRequest]
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from typing import List
+from pydantic import BaseModel, Field
 from device.domain.model.servo_group import Column
 
 class CreateServoGroupRequest(BaseModel):
@@ -11,4 +12,11 @@ class UpdateServoGroupNumServosRequest(BaseModel):
     num_servos: int
 
 class UpdateServoGroupNameRequest(BaseModel):
-    name: str
\ No newline at end of file
+    name: str
+
+class MoveServoGroupRequest(BaseModel):
+    sequence: int = Field(..., ge=1)
+
+class ReorderServoGroupsRequest(BaseModel):
+    column: Column
+    servo_group_ids: List[int]
@@ -2,9 +2,12 @@ from typing import Optional
 from pydantic import BaseModel
 
 from device.domain.model.coordinates_json import CoordinatesJson
+from device.resource.response.position_response import PositionResponse
 
 class MovementResponse(BaseModel):
     id: int
     name: str
     coordinates: Optional[CoordinatesJson]
-    
+
+class MovementTreeResponse(MovementResponse):
+    positions: list[PositionResponse]
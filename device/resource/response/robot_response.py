@@ -2,6 +2,8 @@ from typing import Optional
 from pydantic import BaseModel
 
 from device.domain.model.position_json import PositionJson
+from device.resource.response.movement_response import MovementTreeResponse
+from device.resource.response.servo_group_response import ServoGroupResponse
 
 class RobotResponse(BaseModel):
     id: int
@@ -14,11 +16,19 @@ class RobotResponse(BaseModel):
     current_position: Optional[PositionJson]
     is_connected_broker: bool
 
+class RobotTreeResponse(RobotResponse):
+    servo_groups: list[ServoGroupResponse]
+    movements: list[MovementTreeResponse]
+
 class RobotResponseForAll(BaseModel):
     id: int
     botname: str
     description: str
     image_url: Optional[str]
     is_connected_broker: bool
+
+class RobotPageResponse(BaseModel):
+    items: list[RobotResponseForAll]
+    next_cursor: Optional[int]
     
     
\ No newline at end of file
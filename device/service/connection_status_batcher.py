@@ -0,0 +1,59 @@
+import logging
+from datetime import datetime, timezone
+from crosscutting.periodic_flusher import PeriodicFlusher
+from device.domain.persistence.robot_repository import RobotRepository
+
+logger = logging.getLogger(__name__)
+
+class ConnectionStatusBatcher(PeriodicFlusher):
+    # Estado de conexión recibido por MQTT, agrupado por robot (gana el último) y escrito
+    # cada flushInterval segundos con un UPDATE por estado en lugar de una lectura y un UPDATE por mensaje.
+    # Cada estado lleva el número de llegada de su mensaje y se ignoran los que llegan detrás de uno más reciente.
+    def __init__(self, robotRepository: RobotRepository, flushInterval: float):
+        super().__init__(flushInterval)
+        self.repository = robotRepository
+        self.pending: dict[str, tuple[bool, int]] = {}
+        # Último número de llegada aceptado por robot, se conserva entre escrituras
+        self.sequences: dict[str, int] = {}
+
+    def accept(self, uniqueUid: str, sequence: int) -> bool:
+        if sequence <= self.sequences.get(uniqueUid, -1):
+            return False
+        self.sequences[uniqueUid] = sequence
+        return True
+
+    def set(self, uniqueUid: str, isConnected: bool, sequence: int):
+        if self.accept(uniqueUid, sequence):
+            self.pending[uniqueUid] = (isConnected, sequence)
+
+    def discard(self, uniqueUid: str):
+        self.pending.pop(uniqueUid, None)
+        self.sequences.pop(uniqueUid, None)
+
+    async def flush(self):
+        if not self.pending:
+            return
+        statuses, self.pending = self.pending, {}
+        changedAt = datetime.now(timezone.utc).replace(tzinfo=None)
+        for isConnected in (True, False):
+            uniqueUids = [uniqueUid for uniqueUid, (status, _) in statuses.items() if status == isConnected]
+            if not uniqueUids:
+                continue
+            try:
+                await self.repository.updateConnectionStatusByUniqueUids(uniqueUids, isConnected, changedAt)
+            except Exception as e:
+                logger.error(f"Error al guardar el estado de conexión de {len(uniqueUids)} robots: {e}")
+                self.requeue({uniqueUid: statuses[uniqueUid] for uniqueUid in uniqueUids})
+            except BaseException:
+                # Cancelada a mitad de la escritura, se conserva este grupo y los que faltan para el flush final
+                self.requeue(statuses)
+                raise
+            for uniqueUid in uniqueUids:
+                statuses.pop(uniqueUid)
+
+    # Se reintentan en la siguiente escritura salvo que ya haya un estado más reciente
+    def requeue(self, statuses: dict[str, tuple[bool, int]]):
+        for uniqueUid, (isConnected, sequence) in statuses.items():
+            current = self.pending.get(uniqueUid)
+            if current is None or current[1] < sequence:
+                self.pending[uniqueUid] = (isConnected, sequence)
@@ -0,0 +1,56 @@
+import logging
+from typing import Optional
+from sqlalchemy.orm.attributes import set_committed_value
+from crosscutting.periodic_flusher import PeriodicFlusher
+from device.domain.model.robot import Robot
+from device.domain.persistence.robot_repository import RobotRepository
+
+logger = logging.getLogger(__name__)
+
+class CurrentPositionStore(PeriodicFlusher):
+    # Posición actual de cada robot en memoria, escrita en la BD por lotes cada flushInterval segundos.
+    # Si llegan varias posiciones del mismo robot entre dos escrituras solo se guarda la última.
+    def __init__(self, robotRepository: RobotRepository, flushInterval: float):
+        super().__init__(flushInterval)
+        self.repository = robotRepository
+        self.pending: dict[int, dict] = {}
+        self.flushing: dict[int, dict] = {}
+
+    def set(self, robotId: int, position: dict):
+        self.pending[robotId] = position
+
+    def get(self, robotId: int) -> Optional[dict]:
+        return self.pending.get(robotId, self.flushing.get(robotId))
+
+    def discard(self, robotId: int):
+        self.pending.pop(robotId, None)
+        self.flushing.pop(robotId, None)
+
+    # Superpone la posición pendiente al robot leído de la BD sin marcarlo como modificado
+    def overlay(self, robot: Optional[Robot]) -> Optional[Robot]:
+        if robot is not None:
+            position = self.get(robot.id)
+            if position is not None:
+                set_committed_value(robot, "current_position", position)
+        return robot
+
+    async def flush(self):
+        if not self.pending:
+            return
+        self.flushing, self.pending = self.pending, {}
+        try:
+            await self.repository.updateCurrentPositions(self.flushing)
+        except Exception as e:
+            logger.error(f"Error al guardar las posiciones actuales: {e}")
+            self.requeue()
+        except BaseException:
+            # Cancelada a mitad de la escritura, el lote se conserva para el flush final
+            self.requeue()
+            raise
+        finally:
+            self.flushing = {}
+
+    # Se reintentan en la siguiente escritura salvo que ya haya una posición más reciente
+    def requeue(self):
+        for robotId, position in self.flushing.items():
+            self.pending.setdefault(robotId, position)
@@ -1,51 +1,64 @@
 import logging
 from typing import Optional
 from fastapi import HTTPException, status
+from core.config import settings
+from core.database import afterCommit
+from crosscutting.ownership_index import OwnershipIndex
 from device.domain.model.movement import Movement
 from device.domain.persistence.movement_repository import MovementRepository
 from device.domain.persistence.position_repository import PositionRepository
+from security.domain.persistence.user_repository import UserRepository
 
 logger = logging.getLogger(__name__)
 
 class MovementService:
-    def __init__(self, movementRepository: MovementRepository, positionRepository: PositionRepository):
+    def __init__(self, movementRepository: MovementRepository, positionRepository: PositionRepository, userRepository: UserRepository,
+                 ownershipIndex: OwnershipIndex):
         self.repository = movementRepository
         self.positionRepository = positionRepository
+        self.userRepository = userRepository
+        self.ownershipIndex = ownershipIndex
     
-    def create(self, movement: Movement):
+    async def create(self, movement: Movement):
+        movement.user_id = await self.userRepository.findIdByRobotId(movement.robot_id)
+        if movement.user_id is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Robot not found")
+        
         if movement.coordinates:
-            if self.repository.findByIdAndCoordinates(movement.robot_id, movement.coordinates):
+            if await self.repository.findByIdAndCoordinates(movement.robot_id, movement.coordinates):
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The movement coordinates already exists for this robot")
             
-        if self.repository.findByRobotIdAndName(movement.robot_id, movement.name):
+        if await self.repository.findByRobotIdAndName(movement.robot_id, movement.name):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The movement already exists for this robot")
         
-        if len(self.repository.findAllByRobotId(movement.robot_id)) >= 10:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The robot reached its limit with 10 movements")
+        if await self.repository.countByRobotId(movement.robot_id) >= settings.max_movements_per_robot:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"The robot reached its limit with {settings.max_movements_per_robot} movements")
         
-        return self.repository.save(movement)
+        return await self.repository.save(movement)
     
-    def getById(self, movementId: int):
-        movement = self.repository.findById(movementId)
+    async def getById(self, movementId: int):
+        movement = await self.repository.findById(movementId)
         if not movement:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Movement not found")
         return movement
     
-    def getAllByRobotId(self, robotId: int):
-        return self.repository.findAllByRobotId(robotId)
+    async def getAllByRobotId(self, robotId: int):
+        return await self.repository.findAllByRobotId(robotId)
     
-    def update(self, movementToUpdate: Movement, newName: str, newCoordinates: Optional[str]):
+    async def update(self, movementToUpdate: Movement, newName: str, newCoordinates: Optional[str]):
         if newCoordinates and newCoordinates != movementToUpdate.coordinates:
-            if self.repository.findByIdAndCoordinates(movementToUpdate.robot_id, newCoordinates):
+            if await self.repository.findByIdAndCoordinates(movementToUpdate.robot_id, newCoordinates):
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The movement coordinates already exists for this robot")
         
-        if newName != movementToUpdate.name and self.repository.findByRobotIdAndName(movementToUpdate.robot_id, newName):
+        if newName != movementToUpdate.name and await self.repository.findByRobotIdAndName(movementToUpdate.robot_id, newName):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The movememnt name already exists for this robot")
         
         movementToUpdate.name = newName
         movementToUpdate.coordinates=newCoordinates
-        return self.repository.save(movementToUpdate)
+        return await self.repository.save(movementToUpdate)
     
-    def delete(self, movementToDelete: Movement):
-        self.repository.deleteById(movementToDelete.id)
+    async def delete(self, movementToDelete: Movement):
+        movementId = movementToDelete.id
+        await self.repository.deleteById(movementId)
+        afterCommit(lambda: self.ownershipIndex.forgetMovement(movementId))
         return True
\ No newline at end of file
@@ -1,52 +1,106 @@
 import json
 from fastapi import HTTPException, status
+from core.config import settings
+from core.database import afterCommit
+from crosscutting.ownership_index import OwnershipIndex
 from device.domain.model.position import Position
+from device.domain.model.position_angles import dumpAngles
+from device.domain.persistence.movement_repository import MovementRepository
 from device.domain.persistence.position_repository import PositionRepository
 from security.domain.persistence.user_repository import UserRepository
 
 class PositionService:
-    def __init__(self, positionRepository: PositionRepository):
+    def __init__(self, positionRepository: PositionRepository, movementRepository: MovementRepository, ownershipIndex: OwnershipIndex):
         self.repository = positionRepository
+        self.movementRepository = movementRepository
+        self.ownershipIndex = ownershipIndex
 
-    def create(self, position: Position):
-        if len(self.repository.findAllByMovementId(position.movement_id)) >= 16:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The movement reached its limit with 16 positions")
+    # Copia en las posiciones el robot y el usuario dueños de su movimiento
+    async def setOwner(self, movementId: int, positions: list[Position]):
+        owner = await self.movementRepository.findOwnerIdsById(movementId)
+        if not owner:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Movement not found")
+        for position in positions:
+            position.robot_id, position.user_id = owner.robot_id, owner.user_id
+
+    async def create(self, position: Position):
+        await self.setOwner(position.movement_id, [position])
+        if await self.repository.countByMovementId(position.movement_id) >= settings.max_positions_per_movement:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"The movement reached its limit with {settings.max_positions_per_movement} positions")
         
-        max_sequence = self.repository.findMaxSequenceByMovementId(position.movement_id)
+        max_sequence = await self.repository.findMaxSequenceByMovementId(position.movement_id)
         position.sequence = max_sequence + 1
-        return self.repository.save(position)
+        position = await self.repository.save(position)
+        await self.movementRepository.incrementPayloadVersion(position.movement_id)
+        return position
 
-    def getById(self, positionId: int):
-        position = self.repository.findById(positionId)
+    async def replaceAllByMovementId(self, movementId: int, positions: list[Position]):
+        if len(positions) > settings.max_positions_per_movement:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"The movement can have at most {settings.max_positions_per_movement} positions")
+        
+        for sequence, position in enumerate(positions, start=1):
+            position.sequence = sequence
+        await self.setOwner(movementId, positions)
+        positions = await self.repository.replaceAllByMovementId(movementId, positions)
+        await self.movementRepository.incrementPayloadVersion(movementId)
+        afterCommit(lambda: self.ownershipIndex.forgetPositionsOfMovement(movementId))
+        return positions
+
+    async def getById(self, positionId: int):
+        position = await self.repository.findById(positionId)
         if not position:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Position not found")
         return position
     
-    def getAllByMovementId(self, movementId: int):
-        return self.repository.findAllByMovementId(movementId)
+    async def getAllByMovementId(self, movementId: int):
+        return await self.repository.findAllByMovementId(movementId)
     
-    def update(self, positionToUpdate: Position, newDelay: int, newAngles: str):
+    async def update(self, positionToUpdate: Position, newDelay: int, newAngles: list[int]):
         positionToUpdate.delay = newDelay
-        positionToUpdate.angles = newAngles
-        return self.repository.save(positionToUpdate)
+        positionToUpdate.sqlmodel_update(dumpAngles(newAngles))
+        await self.movementRepository.incrementPayloadVersion(positionToUpdate.movement_id)
+        return await self.repository.save(positionToUpdate)
         
-    def increaseSequence(self, positionToIncrease: Position):
-        max_sequence = self.repository.findMaxSequenceByMovementId(positionToIncrease.movement_id)
+    async def increaseSequence(self, positionToIncrease: Position):
+        max_sequence = await self.repository.findMaxSequenceByMovementId(positionToIncrease.movement_id)
 
         if positionToIncrease.sequence >= max_sequence:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Position is already at the maximum sequence")
         
-        return self.repository.increaseSequence(positionToIncrease)        
+        await self.movementRepository.incrementPayloadVersion(positionToIncrease.movement_id)
+        return await self.repository.increaseSequence(positionToIncrease)
     
-    def decreaseSequence(self, positionToDecrease: Position):
+    async def decreaseSequence(self, positionToDecrease: Position):
         if positionToDecrease.sequence <= 1:  # La secuencia mínima es 1
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Position is already at the minimum sequence")
         
-        return self.repository.decreaseSequence(positionToDecrease)
+        await self.movementRepository.incrementPayloadVersion(positionToDecrease.movement_id)
+        return await self.repository.decreaseSequence(positionToDecrease)
+    
+    async def moveToSequence(self, positionToMove: Position, targetSequence: int):
+        max_sequence = await self.repository.findMaxSequenceByMovementId(positionToMove.movement_id)
+
+        if not 1 <= targetSequence <= max_sequence:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Target sequence is out of range")
+        
+        await self.movementRepository.incrementPayloadVersion(positionToMove.movement_id)
+        return await self.repository.moveToSequence(positionToMove, targetSequence)
+    
+    async def reorder(self, movementId: int, positionIds: list[int]):
+        positionsById = {position.id: position for position in await self.repository.findAllByMovementId(movementId)}
+
+        if len(positionIds) != len(positionsById) or set(positionIds) != set(positionsById):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The position ids must match the positions of the movement")
+        
+        await self.movementRepository.incrementPayloadVersion(movementId)
+        return await self.repository.reorder([positionsById[positionId] for positionId in positionIds])
     
-    def delete(self, positionToDelete: Position):
-        self.repository.deleteById(positionToDelete.id)
-        self.repository.decrementSequenceAfter(positionToDelete)
+    async def delete(self, positionToDelete: Position):
+        await self.repository.deleteById(positionToDelete.id)
+        await self.repository.decrementSequenceAfter(positionToDelete)
+        await self.movementRepository.incrementPayloadVersion(positionToDelete.movement_id)
+        positionId = positionToDelete.id
+        afterCommit(lambda: self.ownershipIndex.forgetPosition(positionId))
         return True
     
 
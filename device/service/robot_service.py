@@ -1,7 +1,11 @@
 import json
 import logging
 import uuid
+from datetime import datetime, timezone
+from typing import Optional
 from fastapi import HTTPException, UploadFile, status
+from core.config import settings
+from core.database import afterCommit
 from crosscutting.service.cloudinary_service import CloudinaryService
 from device.domain.model.movement import Movement
 from device.domain.model.position import Position
@@ -9,8 +13,14 @@ from device.domain.persistence.movement_repository import MovementRepository
 from device.domain.persistence.position_repository import PositionRepository
 from device.domain.persistence.robot_repository import RobotRepository
 from device.domain.model.robot import Robot
-from crosscutting.mqtt_client import mqttClient
-from device.domain.model.position_json import PositionJson, loadPosition
+from crosscutting.mqtt_connection import MqttConnection
+from crosscutting.ownership_index import OwnershipIndex
+from crosscutting.cache import TTLCache
+from device.domain.model.position_angles import loadAngles
+from device.domain.model.position_json import constructPosition
+from device.service.connection_status_batcher import ConnectionStatusBatcher
+from device.service.current_position_store import CurrentPositionStore
+from device.service.robot_uid_index import RobotUidIndex
 from security.domain.model.user import User
 from security.domain.persistence.user_repository import UserRepository
 
@@ -20,98 +30,144 @@ class RobotService:
     def __init__(self, robotRepository: RobotRepository, 
                  movementRepository: MovementRepository,
                  positionRepository: PositionRepository,
-                 cloudinaryService: CloudinaryService):
+                 cloudinaryService: CloudinaryService,
+                 currentPositionStore: CurrentPositionStore,
+                 connectionStatusBatcher: ConnectionStatusBatcher,
+                 robotUidIndex: RobotUidIndex,
+                 mqttConnection: MqttConnection,
+                 movementPayloadCache: TTLCache,
+                 ownershipIndex: OwnershipIndex):
         self.repository = robotRepository
         self.movementRepository = movementRepository
         self.positionRepository = positionRepository
         self.cloudinaryService = cloudinaryService
+        self.currentPositionStore = currentPositionStore
+        self.connectionStatusBatcher = connectionStatusBatcher
+        self.robotUidIndex = robotUidIndex
+        self.mqttConnection = mqttConnection
+        self.movementPayloadCache = movementPayloadCache
+        self.ownershipIndex = ownershipIndex
     
-    def create(self, robot: Robot):                        
-        if self.repository.findByBotname(robot.botname):
+    async def create(self, robot: Robot):                        
+        if await self.repository.findByBotname(robot.botname):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Robot already exists")
         
-        if len(self.repository.findAllByUserId(robot.user_id)) >= 2:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The user reached its limit with 2 robots")
+        if await self.repository.countByUserId(robot.user_id) >= settings.max_robots_per_user:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"The user reached its limit with {settings.max_robots_per_user} robots")
         
-        while self.repository.findByUniqueUid(robot.unique_uid):
+        while await self.repository.findByUniqueUid(robot.unique_uid):
             robot.unique_uid = str(uuid.uuid4())
         
-        return self.repository.save(robot)
+        robot = await self.repository.save(robot)
+        uniqueUid, robotId, userId = robot.unique_uid, robot.id, robot.user_id
+        afterCommit(lambda: self.robotUidIndex.add(uniqueUid, robotId, userId))
+        return robot
+    
+    async def getById(self, robotId: int):
+        robot = self.currentPositionStore.overlay(await self.repository.findById(robotId))
+        if not robot:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Robot not found")
+        return robot
     
-    def getById(self, robotId: int):
-        robot = self.repository.findById(robotId)
+    async def getByUniqueUid(self, uniqueUid: str):
+        robot = self.currentPositionStore.overlay(await self.repository.findByUniqueUid(uniqueUid))
         if not robot:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Robot not found")
         return robot
     
-    def getByUniqueUid(self, uniqueUid: str):
-        robot = self.repository.findByUniqueUid(uniqueUid)
+    async def getTreeById(self, robotId: int):
+        robot = self.currentPositionStore.overlay(await self.repository.findTreeById(robotId))
         if not robot:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Robot not found")
         return robot
     
-    def getByBotname(self, botname: str):
-        robot = self.repository.findByBotname(botname)
+    async def getByBotname(self, botname: str):
+        robot = self.currentPositionStore.overlay(await self.repository.findByBotname(botname))
         if not robot:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Robot not found")
         return robot
     
-    def getAllByUserId(self, userId: int):
-        return self.repository.findAllByUserId(userId)
+    async def getAllByUserId(self, userId: int):
+        return [self.currentPositionStore.overlay(robot) for robot in await self.repository.findAllByUserId(userId)]
 
-    def getAll(self):
-        return self.repository.findAll()
+    async def getPage(self, limit: int, afterId: Optional[int] = None, 
+                      botnamePrefix: Optional[str] = None, isConnectedBroker: Optional[bool] = None):
+        # Se pide un robot de más para saber si existe una página siguiente
+        robots = await self.repository.findPage(limit + 1, afterId, botnamePrefix, isConnectedBroker)
+        nextCursor = robots[limit - 1].id if len(robots) > limit else None
+        return robots[:limit], nextCursor
     
-    def update(self, robotToUpdate: Robot, newBotname: str, newDescription: str): 
-        if newBotname != robotToUpdate.botname and self.repository.findByBotname(newBotname):
+    async def update(self, robotToUpdate: Robot, newBotname: str, newDescription: str): 
+        if newBotname != robotToUpdate.botname and await self.repository.findByBotname(newBotname):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Robot already exists")
         
         robotToUpdate.botname=newBotname
         robotToUpdate.description=newDescription
-        return self.repository.save(robotToUpdate)
+        return await self.repository.save(robotToUpdate)
     
-    def updateImage(self, robotToUpdate: Robot, newImageFile: UploadFile):
+    async def updateImage(self, robotToUpdate: Robot, newImageFile: UploadFile):
         robotToUpdate.image_url = self.cloudinaryService.uploadImage("robots/image", robotToUpdate.unique_uid, newImageFile)
-        return self.repository.save(robotToUpdate)
+        return await self.repository.save(robotToUpdate)
 
-    def updateConfigImage(self, robotToUpdate: Robot, newConfigImageFile: UploadFile):
+    async def updateConfigImage(self, robotToUpdate: Robot, newConfigImageFile: UploadFile):
         robotToUpdate.config_image_url = self.cloudinaryService.uploadImage("robots/config-image", robotToUpdate.unique_uid, newConfigImageFile)
-        return self.repository.save(robotToUpdate)
+        return await self.repository.save(robotToUpdate)
 
-    def updateInitialPosition(self, robotToUpdate: Robot, newInitialPosition: str):
+    async def updateInitialPosition(self, robotToUpdate: Robot, newInitialPosition: dict):
         robotToUpdate.initial_position = newInitialPosition
-        return self.repository.save(robotToUpdate)
-
-    def updateCurrentPosition(self, robotToUpdate: Robot, newCurrentPosition: str): 
-        robotToUpdate.current_position = newCurrentPosition
-        return self.repository.save(robotToUpdate)
-    
-    def updateConnectionStatusByUUID(self, uniqueUid: int, isConnected: bool):
-        robot = self.repository.findByUniqueUid(uniqueUid)
-        if robot:
-            robot.is_connected_broker = isConnected
-            self.repository.save(robot)
-        else:
+        return await self.repository.save(robotToUpdate)
+
+    async def updateCurrentPosition(self, robotToUpdate: Robot, newCurrentPosition: dict): 
+        if not self.currentPositionStore.enabled:
+            robotToUpdate.current_position = newCurrentPosition
+            return await self.repository.save(robotToUpdate)
+        
+        # Se guarda en memoria y se escribe en la BD en el siguiente lote
+        self.currentPositionStore.set(robotToUpdate.id, newCurrentPosition)
+        return self.currentPositionStore.overlay(robotToUpdate)
+    
+    # sequence es el orden de llegada del mensaje MQTT, un estado más antiguo que el último aplicado se ignora
+    async def updateConnectionStatusByUUID(self, uniqueUid: str, isConnected: bool, sequence: int):
+        if not self.robotUidIndex.contains(uniqueUid):
             logger.error(f"No se encontró el robot con UUID: {uniqueUid}")
+            return
+        
+        if self.connectionStatusBatcher.enabled:
+            # Se agrupa con el resto de cambios de estado y se escribe en el siguiente lote
+            self.connectionStatusBatcher.set(uniqueUid, isConnected, sequence)
+            return
+        
+        if not self.connectionStatusBatcher.accept(uniqueUid, sequence):
+            return
+        
+        changedAt = datetime.now(timezone.utc).replace(tzinfo=None)
+        await self.repository.updateConnectionStatusByUniqueUids([uniqueUid], isConnected, changedAt)
     
-    def delete(self, robotToDelete: Robot):
-        self.repository.deleteById(robotToDelete.id)
+    async def delete(self, robotToDelete: Robot):
+        await self.repository.deleteById(robotToDelete.id)
+        uniqueUid, robotId = robotToDelete.unique_uid, robotToDelete.id
+        def forgetRobot():
+            self.ownershipIndex.forgetRobot(robotId)
+            self.currentPositionStore.discard(robotId)
+            self.connectionStatusBatcher.discard(uniqueUid)
+            self.robotUidIndex.remove(uniqueUid)
+        afterCommit(forgetRobot)
         return True
     
-    def moveToInitialPosition(self, robot: Robot):
+    async def moveToInitialPosition(self, robot: Robot):
         if not robot.initial_position:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Position not found")
         
-        initialPosition = loadPosition(robot.initial_position)
+        initialPosition = constructPosition(robot.initial_position)
         
         message = [{"delay": initialPosition.delay, "angles": initialPosition.angles}]
 
         topic = f"robot/{robot.unique_uid}/access/positions"
-        mqttClient.publish(topic, json.dumps(message))
+        self.mqttConnection.publish(topic, json.dumps(message))
         logger.info(f"Data sent to topic {topic}")
         
         # Actualizar la posición actual del robot en la base de datos
-        return self.updateCurrentPosition(robot, robot.initial_position)
+        return await self.updateCurrentPosition(robot, robot.initial_position)
     
     # def updateAndmoveToInitialPosition(self, robot: Robot, newInitialPosition: str):
     #     robot = self.updateInitialPosition(robot, newInitialPosition)
@@ -126,55 +182,67 @@ class RobotService:
         
     #     return self.updateCurrentPosition(robot, robot.initial_position)
     
-    def updateAndMoveToCurrentPosition(self, robot: Robot, newCurrentPosition: str):
-        robot = self.updateCurrentPosition(robot, newCurrentPosition)
+    async def updateAndMoveToCurrentPosition(self, robot: Robot, newCurrentPosition: dict):
+        robot = await self.updateCurrentPosition(robot, newCurrentPosition)
 
-        currentPosition = loadPosition(robot.current_position)
+        currentPosition = constructPosition(robot.current_position)
 
         message = [{"delay": currentPosition.delay, "angles": currentPosition.angles}]
 
         topic = f"robot/{robot.unique_uid}/access/positions"
-        mqttClient.publish(topic, json.dumps(message))
+        self.mqttConnection.publish(topic, json.dumps(message))
         logger.info(f"Data sent to topic {topic}")
 
         return robot
     
     # ejecutar movimmientos por su nombre
-    def executeMovement(self, robot: Robot, movementId: int): #robotId: int, movementName: str):            
-        positions = self.positionRepository.findAllByMovementId(movementId) 
-        if not positions:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No positions found")
+    async def executeMovement(self, robot: Robot, movementId: int): #robotId: int, movementName: str):            
+        # La versión cambia con cada modificación de las posiciones, así una entrada nunca queda obsoleta
+        # aunque el cambio se haya hecho en otro worker
+        payloadVersion = await self.movementRepository.findPayloadVersionById(movementId)
+        if payloadVersion is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Movement not found")
+        cacheKey = (movementId, payloadVersion)
+        cachedPayload = self.movementPayloadCache.get(cacheKey)
+        if cachedPayload is None:
+            positions = await self.positionRepository.findAllByMovementId(movementId) 
+            if not positions:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No positions found")
 
-        message = [{"delay": position.delay, "angles": json.loads(position.angles)} for position in positions]
+            message = [{"delay": position.delay, "angles": loadAngles(position)} for position in positions]
+            lastPosition = message[-1]
+            cachedPayload = (json.dumps(message).encode(), lastPosition)
+            self.movementPayloadCache.set(cacheKey, cachedPayload)
+        payload, lastPosition = cachedPayload
 
         topic = f"robot/{robot.unique_uid}/access/positions"
-        mqttClient.publish(topic, json.dumps(message))
+        self.mqttConnection.publish(topic, payload)
         logger.info(f"Data sent to topic {topic}")
         
-        return self.updateCurrentPosition(robot, PositionJson(delay=positions[-1].delay, angles=json.loads(positions[-1].angles)).model_dump_json())
+        return await self.updateCurrentPosition(robot, lastPosition)
     
     # ejecutar movimmientos por su nombre
-    def moveToPosition(self, robot: Robot, positionId: int): #robotId: int, movementName: str, positionSequence: int):
-        position = self.positionRepository.findById(positionId)
+    async def moveToPosition(self, robot: Robot, positionId: int): #robotId: int, movementName: str, positionSequence: int):
+        position = await self.positionRepository.findById(positionId)
         
-        message = [{"delay": position.delay, "angles": json.loads(position.angles)}]
+        message = [{"delay": position.delay, "angles": loadAngles(position)}]
 
         topic = f"robot/{robot.unique_uid}/access/positions"
-        mqttClient.publish(topic, json.dumps(message))
+        self.mqttConnection.publish(topic, json.dumps(message))
         logger.info(f"Data sent to topic {topic}")
         
-        return self.updateCurrentPosition(robot, PositionJson(delay=position.delay, angles=json.loads(position.angles)).model_dump_json())
+        return await self.updateCurrentPosition(robot, message[0])
     
     # ---------------- METODOS TRANSACCIONALES PARA EL ALMACENAMIENTO LOCAL DEL ROBOT-----------------
-    def saveMovementInLocal(self, robot: Robot, movementId: int):
-        movement = self.movementRepository.findById(movementId)
+    async def saveMovementInLocal(self, robot: Robot, movementId: int):
+        movement = await self.movementRepository.findById(movementId)
         
-        positions = self.positionRepository.findAllByMovementId(movement.id) 
+        positions = await self.positionRepository.findAllByMovementId(movement.id) 
         if not positions:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No positions found")
         
         positions_data = [
-            {"delay": position.delay, "angles": json.loads(position.angles)} for position in positions
+            {"delay": position.delay, "angles": loadAngles(position)} for position in positions
         ]
 
         message = {
@@ -183,18 +251,18 @@ class RobotService:
         }
 
         topic = f"robot/{robot.unique_uid}/access/storage/save-movement"
-        mqttClient.publish(topic, json.dumps(message))
+        self.mqttConnection.publish(topic, json.dumps(message))
         logger.info(f"Data sent to topic {topic}")
 
         return True
      
-    def deleteMovementInLocal(self, robot: Robot, movementId: int):
-        movement = self.movementRepository.findById(movementId)
+    async def deleteMovementInLocal(self, robot: Robot, movementId: int):
+        movement = await self.movementRepository.findById(movementId)
 
         message = { "name": movement.name }
 
         topic = f"robot/{robot.unique_uid}/access/storage/delete-movement"
-        mqttClient.publish(topic, json.dumps(message))
+        self.mqttConnection.publish(topic, json.dumps(message))
         logger.info(f"Data sent to topic {topic}")
 
         return True
@@ -204,32 +272,39 @@ class RobotService:
         if not robot.initial_position:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Initial position not found")
         
-        message = loadPosition(robot.initial_position).model_dump()
+        message = constructPosition(robot.initial_position).model_dump()
 
         topic = f"robot/{robot.unique_uid}/access/storage/save-initial-position"
-        mqttClient.publish(topic, json.dumps(message))
+        self.mqttConnection.publish(topic, json.dumps(message))
         logger.info(f"Data sent to topic {topic}")
 
         return True
     
     def clearLocalStorage(self, robot: Robot):
         topic = f"robot/{robot.unique_uid}/access/storage/clear"
-        mqttClient.publish(topic)
+        self.mqttConnection.publish(topic)
         logger.info(f"Data sent to topic {topic}")
 
         return True
     
-    def validateMovementAccess(self, robotId: int, movementId: int):
-        robot = self.repository.findByMovementId(movementId)
-        if not robot or robotId != robot.id:
+    async def getIdByMovementId(self, movementId: int):
+        owner = await self.ownershipIndex.resolve("movement", movementId, self.movementRepository.findOwnerIdsById)
+        return owner and owner.robot_id
+    
+    async def getIdByPositionId(self, positionId: int):
+        owner = await self.ownershipIndex.resolve("position", positionId, self.positionRepository.findOwnerIdsById)
+        return owner and owner.robot_id
+    
+    # La pertenencia se comprueba con el índice en memoria y solo se carga el robot una vez validado
+    async def validateMovementAccess(self, robotId: int, movementId: int):
+        if robotId != await self.getIdByMovementId(movementId):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied to resource")
-        return robot
+        return await self.getById(robotId)
         
-    def validatePositionAccess(self, robotId: int, positionId: int):
-        robot = self.repository.findByPositionId(positionId)
-        if not robot or robotId != robot.id:
+    async def validatePositionAccess(self, robotId: int, positionId: int):
+        if robotId != await self.getIdByPositionId(positionId):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied to resource")
-        return robot
+        return await self.getById(robotId)
     
 # robot -> movement -> position
 # position -> movement -> robot
@@ -0,0 +1,51 @@
+import logging
+from crosscutting.periodic_flusher import PeriodicFlusher
+from device.domain.persistence.robot_repository import RobotRepository
+
+logger = logging.getLogger(__name__)
+
+class RobotUidIndex(PeriodicFlusher):
+    # unique_uid -> (id del robot, id del dueño) de todos los robots, cargado al arrancar y mantenido
+    # al crear y borrar robots. Se consulta desde el hilo de red de MQTT, por eso solo se usan
+    # operaciones atómicas de dict y nunca se accede a la BD por un uid que falta.
+    # Los robots creados en otros workers se incorporan cada refreshInterval segundos leyendo solo las
+    # filas con id mayor que el último visto (flush() es aquí ese refresco). Se relee un margen de ids
+    # por debajo porque otra transacción puede confirmar un id menor después de uno mayor.
+    refreshOverlap = 100
+
+    def __init__(self, robotRepository: RobotRepository, refreshInterval: float):
+        super().__init__(refreshInterval)
+        self.repository = robotRepository
+        self.robots: dict[str, tuple[int, int]] = {}
+        self.lastSeenId = 0
+
+    async def warm(self):
+        self.robots = {}
+        self.lastSeenId = 0
+        await self.refresh()
+        logger.info(f"Índice de robots cargado con {len(self.robots)} robots")
+
+    async def refresh(self):
+        rows = await self.repository.findUniqueUidsAfterId(max(self.lastSeenId - self.refreshOverlap, 0))
+        for row in rows:
+            self.robots[row.unique_uid] = (row.id, row.user_id)
+            self.lastSeenId = max(self.lastSeenId, row.id)
+
+    async def flush(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Error al refrescar el índice de robots: {e}")
+
+    def contains(self, uniqueUid: str) -> bool:
+        return uniqueUid in self.robots
+
+    def add(self, uniqueUid: str, robotId: int, userId: int):
+        self.robots[uniqueUid] = (robotId, userId)
+
+    def remove(self, uniqueUid: str):
+        self.robots.pop(uniqueUid, None)
+
+    def removeByUserId(self, userId: int):
+        for uniqueUid in [uniqueUid for uniqueUid, (_, ownerId) in self.robots.items() if ownerId == userId]:
+            self.robots.pop(uniqueUid, None)
@@ -1,62 +1,89 @@
 import json
 from fastapi import HTTPException, status
-from device.domain.model.servo_group import ServoGroup
+from core.config import settings
+from core.database import afterCommit
+from crosscutting.ownership_index import OwnershipIndex
+from device.domain.model.servo_group import Column, ServoGroup
 from device.domain.persistence.servo_group_repository import ServoGroupRepository
 from security.domain.persistence.user_repository import UserRepository
 
 class ServoGroupService:
-    def __init__(self, servoGroupRepository: ServoGroupRepository):
+    def __init__(self, servoGroupRepository: ServoGroupRepository, userRepository: UserRepository, ownershipIndex: OwnershipIndex):
         self.repository = servoGroupRepository
+        self.userRepository = userRepository
+        self.ownershipIndex = ownershipIndex
     
-    def create(self, servoGroup: ServoGroup):
-        if self.repository.findByRobotIdAndName(servoGroup.robot_id, servoGroup.name):
+    async def create(self, servoGroup: ServoGroup):
+        servoGroup.user_id = await self.userRepository.findIdByRobotId(servoGroup.robot_id)
+        if servoGroup.user_id is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Robot not found")
+        
+        if await self.repository.findByRobotIdAndName(servoGroup.robot_id, servoGroup.name):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The servo group already exists for this robot")
 
-        if sum(existingServoGroup.num_servos
-               for existingServoGroup in self.repository.findAllByRobotId(servoGroup.robot_id)) >= 24:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The robot reached its limit with 24 Servo Angles")
+        if await self.repository.sumNumServosByRobotId(servoGroup.robot_id) >= settings.max_servos_per_robot:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"The robot reached its limit with {settings.max_servos_per_robot} Servo Angles")
         
-        max_sequence = self.repository.findMaxSequenceByRobotIdAndColumn(servoGroup.robot_id, servoGroup.column)
+        max_sequence = await self.repository.findMaxSequenceByRobotIdAndColumn(servoGroup.robot_id, servoGroup.column)
         servoGroup.sequence = max_sequence + 1
-        return self.repository.save(servoGroup)
+        return await self.repository.save(servoGroup)
     
-    def getById(self, servoGroupId: int):
-        servoGroup = self.repository.findById(servoGroupId)
+    async def getById(self, servoGroupId: int):
+        servoGroup = await self.repository.findById(servoGroupId)
         if not servoGroup:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Servo group not found")
         return servoGroup
     
-    def getAllByRobotId(self, servoGroupId: int):
-        return self.repository.findAllByRobotId(servoGroupId)
+    async def getAllByRobotId(self, servoGroupId: int):
+        return await self.repository.findAllByRobotId(servoGroupId)
     
-    def updateNumServos(self, servoGroupToUpdate: ServoGroup, newNumServos: int):
+    async def updateNumServos(self, servoGroupToUpdate: ServoGroup, newNumServos: int):
         servoGroupToUpdate.num_servos = newNumServos
-        return self.repository.save(servoGroupToUpdate)
+        return await self.repository.save(servoGroupToUpdate)
     
-    def updateName(self, servoGroupToUpdate: ServoGroup, newName: str):
-        if newName != servoGroupToUpdate.name and self.repository.findByRobotIdAndName(servoGroupToUpdate.robot_id, newName):
+    async def updateName(self, servoGroupToUpdate: ServoGroup, newName: str):
+        if newName != servoGroupToUpdate.name and await self.repository.findByRobotIdAndName(servoGroupToUpdate.robot_id, newName):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The servo group already exists for this robot")
         
         servoGroupToUpdate.name = newName
-        return self.repository.save(servoGroupToUpdate)
+        return await self.repository.save(servoGroupToUpdate)
     
-    def increaseSequence(self, servoGroupToIncrease: ServoGroup):
-        max_sequence = self.repository.findMaxSequenceByRobotIdAndColumn(servoGroupToIncrease.robot_id, servoGroupToIncrease.column)
+    async def increaseSequence(self, servoGroupToIncrease: ServoGroup):
+        max_sequence = await self.repository.findMaxSequenceByRobotIdAndColumn(servoGroupToIncrease.robot_id, servoGroupToIncrease.column)
 
         if servoGroupToIncrease.sequence >= max_sequence:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Position is already at the maximum sequence")
         
-        return self.repository.increaseSequence(servoGroupToIncrease)
+        return await self.repository.increaseSequence(servoGroupToIncrease)
     
-    def decreaseSequence(self, servoGroupToDecrease: ServoGroup):
+    async def decreaseSequence(self, servoGroupToDecrease: ServoGroup):
         if servoGroupToDecrease.sequence <= 1:  # La secuencia mínima es 1
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Position is already at the minimum sequence")
             
-        return self.repository.decreaseSequence(servoGroupToDecrease)
+        return await self.repository.decreaseSequence(servoGroupToDecrease)
+    
+    async def moveToSequence(self, servoGroupToMove: ServoGroup, targetSequence: int):
+        max_sequence = await self.repository.findMaxSequenceByRobotIdAndColumn(servoGroupToMove.robot_id, servoGroupToMove.column)
+
+        if not 1 <= targetSequence <= max_sequence:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Target sequence is out of range")
+        
+        return await self.repository.moveToSequence(servoGroupToMove, targetSequence)
+    
+    async def reorder(self, robotId: int, column: Column, servoGroupIds: list[int]):
+        servoGroupsById = {servoGroup.id: servoGroup for servoGroup in await self.repository.findAllByRobotId(robotId)
+                           if servoGroup.column == column}
+
+        if len(servoGroupIds) != len(servoGroupsById) or set(servoGroupIds) != set(servoGroupsById):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The servo group ids must match the servo groups of the column")
+        
+        return await self.repository.reorder([servoGroupsById[servoGroupId] for servoGroupId in servoGroupIds])
             
-    def delete(self, servoGroupToDelete: ServoGroup):
-        self.repository.deleteById(servoGroupToDelete.id)
-        self.repository.decrementSequenceAfter(servoGroupToDelete)
+    async def delete(self, servoGroupToDelete: ServoGroup):
+        await self.repository.deleteById(servoGroupToDelete.id)
+        await self.repository.decrementSequenceAfter(servoGroupToDelete)
+        servoGroupId = servoGroupToDelete.id
+        afterCommit(lambda: self.ownershipIndex.forgetServoGroup(servoGroupId))
         return True
 
         
\ No newline at end of file
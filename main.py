@@ -1,8 +1,8 @@
+import asyncio
 from contextlib import asynccontextmanager
 import logging
-import time
 import debugpy
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 from fastapi.responses import RedirectResponse
@@ -18,70 +18,87 @@ from device.api.rest.servo_group_controller import router as ServoGroupControlle
 from device.api.rest.movement_controller import router as MovementController
 from device.api.rest.position_controller import router as PositionController
 
+from crosscutting.api.rest.metrics_controller import router as MetricsController
+
 from core.container import Container
 from core.default_data import defaultData
 from core.database import engine
-from crosscutting.mqtt_client import mqttClient
+from core.migrations import runMigrations
 from core.config import settings
 
 logger = logging.getLogger(__name__)
 
 container = Container()
 robotService = container.robotService()
+currentPositionStore = container.currentPositionStore()
+connectionStatusBatcher = container.connectionStatusBatcher()
+robotUidIndex = container.robotUidIndex()
+mqttConnection = container.mqttConnection()
+mqttIngestPipeline = container.mqttIngestPipeline()
 userRepository = container.userRepository()
 
 # Configuración de callbacks para MQTT
 def on_connect(client, userdata, flags, rc):
     if rc == 0:
         logger.info("Conectado al broker MQTT")
-        mqttClient.subscribe("robot/+/access/status")
-        mqttClient.subscribe("robot/+/access/positions")
-        mqttClient.subscribe("robot/+/access/storage/#")
+        client.subscribe("robot/+/access/status")
+        client.subscribe("robot/+/access/positions")
+        client.subscribe("robot/+/access/storage/#")
     else:
         logger.info(f"Conexión fallida. Código de retorno: {rc}")
 
 def on_message(client, userdata, msg):
-    topicParts = msg.topic.split('/')
+    # Este callback corre en el hilo de red de paho, solo encola el mensaje para no bloquear la lectura del socket
+    mqttIngestPipeline.submit(msg.topic, msg.payload)
+
+# Se descartan sin consultar la BD los mensajes de robots que no están en el índice (robot/<unique_uid>/...)
+def isKnownRobotTopic(topic: str):
+    topicParts = topic.split('/')
+    return len(topicParts) > 1 and robotUidIndex.contains(topicParts[1])
+
+# Los mensajes de un mismo robot se procesan en orden, en el mismo worker
+def robotUidOfTopic(topic: str):
+    return topic.split('/')[1]
+
+# Procesa los mensajes de la cola de MQTT en el event loop, cada uno en su propia unidad de trabajo
+async def handleMqttMessage(topic: str, payload: str, sequence: int):
+    topicParts = topic.split('/')
     robotToken = topicParts[1]
 
-    if msg.topic.endswith("/access/status"):
-        if msg.payload.decode() == "offline":
+    if topic.endswith("/access/status"):
+        if payload == "offline":
             logger.info(f"Robot {robotToken} se ha desconectado")
-            robotService.updateConnectionStatusByUUID(robotToken, False)
-        elif msg.payload.decode() == "online":
+            async with container.unitOfWork():
+                await robotService.updateConnectionStatusByUUID(robotToken, False, sequence)
+        elif payload == "online":
             logger.info(f"Robot {robotToken} se ha conectado")
-            robotService.updateConnectionStatusByUUID(robotToken, True)
-        logger.info(f"Status recibido del robot {robotToken}: {msg.payload.decode()}")
-    elif msg.topic.endswith("/access/positions"):
-        logger.info(f"posiciones recibido para robot {robotToken}: {msg.payload.decode()}")
-    elif msg.topic.endswith("/access/storage/save-movement"):
-        logger.info(f"comando de almacenamiento recibido para robot {robotToken}: {msg.payload.decode()}")
-    elif msg.topic.endswith("/access/storage/delete-movement"):
-        logger.info(f"comando de almacenamiento recibido para robot {robotToken}: {msg.payload.decode()}")
-    elif msg.topic.endswith("/access/storage/save-initial-position"):
-        logger.info(f"comando de almacenamiento recibido para robot {robotToken}: {msg.payload.decode()}")
-    elif msg.topic.endswith("/access/storage/clear"):
-        logger.info(f"comando de almacenamiento recibido para robot {robotToken}: {msg.payload.decode()}")
-
-def on_disconnect(client, userdata, rc):
-    logger.warning("Desconectado del broker MQTT. Intentando reconectar...")
-    while True:
-        try:
-            client.reconnect()
-            logger.info("Reconexión exitosa al broker MQTT")
-            return
-        except Exception as e:
-            logger.error(f"Error al intentar reconectar: {e}")
-            time.sleep(5)
+            async with container.unitOfWork():
+                await robotService.updateConnectionStatusByUUID(robotToken, True, sequence)
+        logger.info(f"Status recibido del robot {robotToken}: {payload}")
+    elif topic.endswith("/access/positions"):
+        logger.info(f"posiciones recibido para robot {robotToken}: {payload}")
+    elif topic.endswith("/access/storage/save-movement"):
+        logger.info(f"comando de almacenamiento recibido para robot {robotToken}: {payload}")
+    elif topic.endswith("/access/storage/delete-movement"):
+        logger.info(f"comando de almacenamiento recibido para robot {robotToken}: {payload}")
+    elif topic.endswith("/access/storage/save-initial-position"):
+        logger.info(f"comando de almacenamiento recibido para robot {robotToken}: {payload}")
+    elif topic.endswith("/access/storage/clear"):
+        logger.info(f"comando de almacenamiento recibido para robot {robotToken}: {payload}")
 
 # Lifespan handler para manejar el ciclo de vida de la aplicación
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Iniciar tablas de la base de datos
-    SQLModel.metadata.create_all(engine)
-    defaultData(userRepository)
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.create_all)
+        await connection.run_sync(runMigrations)
+    await defaultData(userRepository)
+    await robotUidIndex.warm()
     # Configurar el contenedor para la inyección de dependencias
     container.wire(modules=[
+        "crosscutting.authorization",
+        "crosscutting.api.rest.metrics_controller",
         "security.api.rest.auth_controller",
         "security.api.rest.user_controller",
         "device.api.rest.robot_controller",
@@ -90,16 +107,30 @@ async def lifespan(app: FastAPI):
         "device.api.rest.position_controller"
     ])
 
-    mqttClient.on_connect = on_connect
-    mqttClient.on_message = on_message
-    mqttClient.on_disconnect = on_disconnect
-    mqttClient.loop_start()
+    await mqttIngestPipeline.start(handleMqttMessage, isKnownRobotTopic, robotUidOfTopic)
+    # El hilo de red de MQTT reconecta por su cuenta, sin bloquear los callbacks
+    mqttConnection.start(on_connect, on_message)
+    await currentPositionStore.start()
+    await connectionStatusBatcher.start()
+    await robotUidIndex.start()
     # Yield permite que la aplicación ejecute normalmente después de que el contexto se ha configurado
     yield
 
-    # Cuando la aplicación se cierra, paramos el loop de MQTT
-    mqttClient.loop_stop()
-    mqttClient.disconnect()
+    # Cuando la aplicación se cierra, paramos el loop de MQTT y los workers de la cola
+    # stop() espera al hilo de red, se hace fuera del event loop para no bloquearlo
+    await asyncio.to_thread(mqttConnection.stop)
+    await mqttIngestPipeline.stop()
+    await robotUidIndex.stop()
+
+    # Se escriben en la BD las posiciones actuales y los estados de conexión que queden pendientes
+    await currentPositionStore.stop()
+    await connectionStatusBatcher.stop()
+
+# Una sola sesión y transacción por petición, con commit al final si no hubo errores.
+# Con scope="function" el commit se hace antes de enviar la respuesta, si falla el cliente recibe un 500
+async def unitOfWork():
+    async with container.unitOfWork():
+        yield
 
 def create_app():
     # Crear la aplicación FastAPI utilizando el lifespan handler
@@ -111,7 +142,8 @@ def create_app():
         license_info=LICENSE_INFO,
         swagger_ui_parameters=SWAGGER_UI_PARAMETERS,
         swagger_favicon_url=SWAGGER_FAVICON_URL,
-        lifespan=lifespan
+        lifespan=lifespan,
+        dependencies=[Depends(unitOfWork, scope="function")]
     )
 
     app.add_middleware(ProxyHeadersMiddleware, trusted_hosts="*")
@@ -131,6 +163,7 @@ def create_app():
     app.include_router(ServoGroupController)
     app.include_router(MovementController)
     app.include_router(PositionController)
+    app.include_router(MetricsController)
     
     return app
 
@@ -18,15 +18,15 @@ router = APIRouter(
 @inject
 async def registerUser(request: RegisterUserRequest,
                        authService: AuthService = Depends(Provide[Container.authService])):
-    user = authService.register(AuthMapper.registerRequestToModel(request))
+    user = await authService.register(AuthMapper.registerRequestToModel(request))
     return AuthMapper.modelToResponseForVerify(user)
 
 @router.post("/login", response_model=AuthResponse)
 @inject
 async def loginUser(request: LoginUserRequest,
                     authService: AuthService = Depends(Provide[Container.authService])):
-    user = authService.authenticate(request.email, request.password.get_secret_value())
-    token = authService.createJWToken(user.email)
+    user = await authService.authenticate(request.email, request.password.get_secret_value())
+    token = authService.createJWToken(user)
     return AuthMapper.modelToResponse(user, token)
 
 @router.post("/refresh-token", response_model=AuthResponseForRefresh)
@@ -34,8 +34,8 @@ async def loginUser(request: LoginUserRequest,
 async def refreshToken(request: RefreshTokenRequest,
                     authService: AuthService = Depends(Provide[Container.authService]),
                     userService: UserService = Depends(Provide[Container.userService])):
-    user = authService.validateUniqueToken(userService.getByUniqueToken(request.unique_token))
-    token = authService.createJWToken(user.email)
+    user = authService.validateUniqueToken(await userService.getByUniqueToken(request.unique_token))
+    token = authService.createJWToken(user)
     return AuthMapper.modelToResponseForRefresh(user, token)
 
 @router.post("/verify-email/send-email", response_model=bool)
@@ -44,14 +44,14 @@ async def sendEmailToVerifyEmail(request: SendEmailRequest,
                                    backgroundTasks: BackgroundTasks,
                                    authService: AuthService = Depends(Provide[Container.authService]),
                                    userService: UserService = Depends(Provide[Container.userService])):
-    return authService.sendEmailToVerifyEmail(userService.getByEmail(request.email), backgroundTasks)
+    return await authService.sendEmailToVerifyEmail(await userService.getByEmail(request.email), backgroundTasks)
 
 @router.post("/verify-email", response_model=bool)
 @inject
 async def verifyEmail(request: EmailVerificationRequest,
                     authService: AuthService = Depends(Provide[Container.authService]),
                     userService: UserService = Depends(Provide[Container.userService])):
-    return authService.verifyEmail(userService.getByVerificationUUID(request.verification_uuid))
+    return await authService.verifyEmail(await userService.getByVerificationUUID(request.verification_uuid))
 
 @router.post("/forgot-password/send-email", response_model=bool)
 @inject
@@ -59,13 +59,13 @@ async def sendEmailToResetPassword(request: SendEmailRequest,
                                    backgroundTasks: BackgroundTasks,
                                    authService: AuthService = Depends(Provide[Container.authService]),
                                    userService: UserService = Depends(Provide[Container.userService])):
-    return authService.sendEmailToResetPassword(userService.getByEmail(request.email), backgroundTasks)
+    return await authService.sendEmailToResetPassword(await userService.getByEmail(request.email), backgroundTasks)
 
 @router.post("/forgot-password/reset-password", response_model=bool)
 @inject
 async def resetPassword(request: PasswordResetRequest,
                     authService: AuthService = Depends(Provide[Container.authService]),
                     userService: UserService = Depends(Provide[Container.userService])):
-    return authService.resetPassword(userService.getByVerificationUUID(request.verification_uuid), pwd_context.hash(request.password.get_secret_value()))
+    return await authService.resetPassword(await userService.getByVerificationUUID(request.verification_uuid), pwd_context.hash(request.password.get_secret_value()))
 
 
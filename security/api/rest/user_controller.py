@@ -1,9 +1,10 @@
 from dependency_injector.wiring import inject, Provide
-from fastapi import APIRouter, Depends
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
 from security.domain.model.user import Role, User
 from security.resource.request.user_request import UpdateUserRequest
 from crosscutting.authorization import authorizeRoles, getAuthenticatedUser
-from security.resource.response.user_response import UserResponse
+from security.resource.response.user_response import UserPageResponse, UserResponse
 from security.mapping.user_mapper import UserMapper
 from security.service.user_service import UserService
 from core.container import Container
@@ -25,28 +26,28 @@ async def getMyUser(authenticatedUser: User = Depends(getAuthenticatedUser)):
 async def updateMyUser(request: UpdateUserRequest, 
                        authenticatedUser: User = Depends(getAuthenticatedUser), 
                        userService: UserService = Depends(Provide[Container.userService])):
-    user = userService.update(authenticatedUser, request.username)
+    user = await userService.update(authenticatedUser, request.username)
     return UserMapper.modelToResponse(user)
 
 @router.delete("/me", response_model=bool, dependencies=[Depends(authorizeRoles([Role.USER, Role.ADMIN]))])
 @inject
 async def deleteMyUser(authenticatedUser: User = Depends(getAuthenticatedUser), 
                        userService: UserService = Depends(Provide[Container.userService])):
-    return userService.delete(authenticatedUser)
+    return await userService.delete(authenticatedUser)
 
 # 2. Métodos dinámicos
 @router.get("/username/{username}", response_model=UserResponse, dependencies=[Depends(authorizeRoles([Role.ADMIN]))])
 @inject
 async def getUserBySearch(username: str, 
                           userService: UserService = Depends(Provide[Container.userService])):
-    user = userService.getByUsername(username)
+    user = await userService.getByUsername(username)
     return UserMapper.modelToResponse(user)
 
 @router.get("/{userId}", response_model=UserResponse, dependencies=[Depends(authorizeRoles([Role.ADMIN]))])
 @inject
 async def getUserById(userId: int, 
                       userService: UserService = Depends(Provide[Container.userService])):
-    user = userService.getById(userId)
+    user = await userService.getById(userId)
     return UserMapper.modelToResponse(user)
     
 # Actualizar usuario por ID (solo accesible por ADMIN)
@@ -55,7 +56,7 @@ async def getUserById(userId: int,
 async def updateUserById(userId: int, 
                          request: UpdateUserRequest, 
                          userService: UserService = Depends(Provide[Container.userService])):
-    user = userService.update(userService.getById(userId), request.username)
+    user = await userService.update(await userService.getById(userId), request.username)
     return UserMapper.modelToResponse(user)
 
 # Eliminar usuario por ID (solo accesible por ADMIN)
@@ -63,11 +64,14 @@ async def updateUserById(userId: int,
 @inject
 async def deleteUserById(userId: int, 
                          userService: UserService = Depends(Provide[Container.userService])):
-    return userService.delete(userService.getById(userId))
+    return await userService.delete(await userService.getById(userId))
 
 # 3. Rutas generales
-@router.get("/", response_model=list[UserResponse], dependencies=[Depends(authorizeRoles([Role.ADMIN]))])
+@router.get("/", response_model=UserPageResponse, dependencies=[Depends(authorizeRoles([Role.ADMIN]))])
 @inject
-async def getAllUsers(userService: UserService = Depends(Provide[Container.userService])):
-    users = userService.getAll()
-    return [UserMapper.modelToResponse(user) for user in users]
+async def getAllUsers(limit: int = Query(50, ge=1, le=200),
+                      afterId: Optional[int] = None,
+                      username: Optional[str] = None,
+                      userService: UserService = Depends(Provide[Container.userService])):
+    users, nextCursor = await userService.getPage(limit, afterId, username)
+    return UserMapper.modelsToPageResponse(users, nextCursor)
@@ -1,4 +1,5 @@
 from typing import Optional
+from sqlalchemy import Row
 from sqlmodel import select
 from device.domain.model.movement import Movement
 from device.domain.model.position import Position
@@ -12,56 +13,68 @@ class UserRepository(BaseRepository[User]):
     def __init__(self):
         super().__init__(User)  # Pasa el modelo User al BaseRepository
 
-    def findByUniqueToken(self, uniqueToken: str) -> Optional[User]:
-        with getSession() as session:
+    async def findByUniqueToken(self, uniqueToken: str) -> Optional[User]:
+        async with getSession() as session:
             statement = select(User).where(User.unique_token == uniqueToken)
-            return session.exec(statement).first()
+            return (await session.exec(statement)).first()
         
-    def findByVerificationUuid(self, verificationUuid: str) -> Optional[User]:
-        with getSession() as session:
+    async def findByVerificationUuid(self, verificationUuid: str) -> Optional[User]:
+        async with getSession() as session:
             statement = select(User).where(User.verification_uuid == verificationUuid)
-            return session.exec(statement).first()
+            return (await session.exec(statement)).first()
         
-    def findByUsername(self, username: str) -> Optional[User]:
-        with getSession() as session:
+    async def findByUsername(self, username: str) -> Optional[User]:
+        async with getSession() as session:
             statement = select(User).where(User.username == username)
-            return session.exec(statement).first()
+            return (await session.exec(statement)).first()
         
-    def findByEmail(self, email: str) -> Optional[User]:
-        with getSession() as session:
+    async def findByEmail(self, email: str) -> Optional[User]:
+        async with getSession() as session:
             statement = select(User).where(User.email == email)
-            return session.exec(statement).first()
+            return (await session.exec(statement)).first()
+    
+    # Paginación por cursor (id del último usuario de la página anterior)
+    # Solo se leen las columnas de UserResponse, como filas y no como objetos del ORM
+    async def findPage(self, limit: int, afterId: Optional[int] = None, usernamePrefix: Optional[str] = None) -> list[Row]:
+        async with getSession() as session:
+            statement = select(User.id, User.email, User.username, User.role)
+            if afterId is not None:
+                statement = statement.where(User.id > afterId)
+            if usernamePrefix:
+                statement = statement.where(User.username.startswith(usernamePrefix, autoescape=True))
+            return (await session.exec(statement.order_by(User.id).limit(limit))).all()
     
     # Metodos para obtener padre por hijos   
-    def findByRobotId(self, robotId: int) -> Optional[User]:
-        with getSession() as session:
+    async def findIdByRobotId(self, robotId: int) -> Optional[int]:
+        async with getSession() as session:
+            statement = select(Robot.user_id).where(Robot.id == robotId)
+            return (await session.exec(statement)).first()
+    
+    async def findByRobotId(self, robotId: int) -> Optional[User]:
+        async with getSession() as session:
             statement = (select(User)
                         .join(Robot, Robot.user_id == User.id)
                         .where(Robot.id == robotId))
-            return session.exec(statement).first()
+            return (await session.exec(statement)).first()
     
-    def findByServoGroupId(self, servoGroupId: int) -> Optional[User]:
-        with getSession() as session:
+    async def findByServoGroupId(self, servoGroupId: int) -> Optional[User]:
+        async with getSession() as session:
             statement = (select(User)
-                        .join(Robot, Robot.user_id == User.id)
-                        .join(ServoGroup, ServoGroup.robot_id == Robot.id)
+                        .join(ServoGroup, ServoGroup.user_id == User.id)
                         .where(ServoGroup.id == servoGroupId))
-            return session.exec(statement).first()
+            return (await session.exec(statement)).first()
         
-    def findByMovementId(self, movementId: int) -> Optional[User]:
-        with getSession() as session:
+    async def findByMovementId(self, movementId: int) -> Optional[User]:
+        async with getSession() as session:
             statement = (select(User)
-                        .join(Robot, Robot.user_id == User.id)
-                        .join(Movement, Movement.robot_id == Robot.id)
+                        .join(Movement, Movement.user_id == User.id)
                         .where(Movement.id == movementId))
-            return session.exec(statement).first()
+            return (await session.exec(statement)).first()
         
-    def findByPositionId(self, positionId: int) -> Optional[User]:
-        with getSession() as session:
+    async def findByPositionId(self, positionId: int) -> Optional[User]:
+        async with getSession() as session:
             statement = (select(User)
-                        .join(Robot, Robot.user_id == User.id)
-                        .join(Movement, Movement.robot_id == Robot.id)
-                        .join(Position, Position.movement_id == Movement.id)
+                        .join(Position, Position.user_id == User.id)
                         .where(Position.id == positionId))
-            return session.exec(statement).first()
+            return (await session.exec(statement)).first()
         
\ No newline at end of file
@@ -1,5 +1,7 @@
+from typing import Optional
+from sqlalchemy import Row
 from security.domain.model.user import User
-from security.resource.response.user_response import UserResponse
+from security.resource.response.user_response import UserPageResponse, UserResponse
 from security.service.auth_service import pwd_context
 
 class UserMapper:                
@@ -9,4 +11,8 @@ class UserMapper:
                             email=user.email, 
                             username=user.username, 
                             role=user.role.value)
-
+    
+    @staticmethod
+    def modelsToPageResponse(users: list[Row], nextCursor: Optional[int]) -> UserPageResponse:
+        return UserPageResponse(items=[UserMapper.modelToResponse(user) for user in users],
+                                next_cursor=nextCursor)
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel
 
 class UserResponse(BaseModel):
@@ -6,3 +7,6 @@ class UserResponse(BaseModel):
     username: str
     role: str
 
+class UserPageResponse(BaseModel):
+    items: list[UserResponse]
+    next_cursor: Optional[int]
@@ -2,12 +2,16 @@ from datetime import datetime, timedelta, timezone
 import logging
 import uuid
 import secrets
+import time
 from fastapi import BackgroundTasks, HTTPException, status
 import jwt
+from sqlalchemy.orm import make_transient_to_detached
 from security.domain.persistence.user_repository import UserRepository
 from security.domain.model.user import Role, User
 from passlib.context import CryptContext 
 from core.config import settings
+from core.database import afterCommit
+from crosscutting.cache import RevocationList, TTLCache
 from crosscutting.service.email_service import EmailService
 
 logger = logging.getLogger(__name__)
@@ -15,31 +19,36 @@ logger = logging.getLogger(__name__)
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
 class AuthService:
-    def __init__(self, userRepository: UserRepository, emailService: EmailService):
+    # authenticatedUserCache guarda los valores de las columnas de los usuarios verificados (email -> dict)
+    # y no la instancia, para no compartirla entre sesiones
+    def __init__(self, userRepository: UserRepository, emailService: EmailService,
+                 authenticatedUserCache: TTLCache, revokedTokens: RevocationList):
         self.repository = userRepository
         self.emailService = emailService
+        self.authenticatedUserCache = authenticatedUserCache
+        self.revokedTokens = revokedTokens
 
-    def register(self, user: User):
-        if self.repository.findByEmail(user.email) or self.repository.findByUsername(user.username):
+    async def register(self, user: User):
+        if await self.repository.findByEmail(user.email) or await self.repository.findByUsername(user.username):
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User already exists")
         
-        user.unique_token = self.generateUniqueToken()
+        user.unique_token = await self.generateUniqueToken()
         user.token_expires_at = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=30)
 
-        return self.updateVerificationUUID(user)
+        return await self.updateVerificationUUID(user)
     
-    def updateVerificationUUID(self, user: User):
-        user.verification_uuid = self.generateUUID()
+    async def updateVerificationUUID(self, user: User):
+        user.verification_uuid = await self.generateUUID()
         user.uuid_expires_at = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=settings.verification_uuid_expire_days)
-        return self.repository.save(user)
+        return await self.repository.save(user)
     
-    def updateUniqueToken(self, user: User):
-        user.unique_token = self.generateUniqueToken()
+    async def updateUniqueToken(self, user: User):
+        user.unique_token = await self.generateUniqueToken()
         user.token_expires_at = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=settings.unique_token_expire_days)
-        return self.repository.save(user)
+        return await self.repository.save(user)
 
-    def authenticate(self, email: str, password: str):
-        user = self.repository.findByEmail(email)
+    async def authenticate(self, email: str, password: str):
+        user = await self.repository.findByEmail(email)
     
         if not user or not self.verifyPassword(password, user.hashed_password):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invalid credentials")
@@ -47,38 +56,67 @@ class AuthService:
         if not user.email_verified_at:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Email not verified")
         
-        return self.updateUniqueToken(user)
+        return await self.updateUniqueToken(user)
 
-    def createJWToken(self, email: str):
+    def createJWToken(self, user: User):
         payload = {
-            "email": email,
+            "email": user.email,
+            "iat": time.time(),
             "exp": datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(minutes=settings.access_token_expire_minutes)
         }
+        if settings.jwt_self_contained_claims:
+            # El token lleva lo necesario para autorizar sin consultar la BD
+            payload.update(sub=str(user.id), role=user.role.value, verified=user.email_verified_at is not None)
         return jwt.encode(payload=payload, key=settings.secret_key, algorithm=settings.algorithm)
 
-    def validateJWToken(self, token: str):
+    def decodeJWToken(self, token: str):
         try:
             payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-            email: str = payload.get("email")
-            logger.info(f"Decoded email: {email}")
-            if not email:
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-            user = self.repository.findByEmail(email)
-            if not user:
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not found")
-            if not user.email_verified_at:
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not verified")
-            return user
         except jwt.ExpiredSignatureError:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired")
         except jwt.InvalidTokenError:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-
-    def authorizeRoles(self, user: User, roles: list[Role]):
-        if user.role not in roles:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permission denied")
-        return True
+        
+        logger.debug(f"Decoded email: {payload.get('email')}")
+        if not payload.get("email"):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+        return payload
     
+    # Devuelve los claims si el token es autocontenido y sigue vigente, None si hay que consultar la BD
+    def getSelfContainedClaims(self, payload: dict):
+        if not settings.jwt_self_contained_claims or "sub" not in payload or "role" not in payload:
+            return None
+        try:
+            userId = int(payload["sub"])
+            role = Role(payload["role"])
+            issuedAt = float(payload.get("iat", 0))
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+        
+        if self.revokedTokens.isRevoked(userId, issuedAt):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+        if not payload.get("verified"):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not verified")
+        return {"user_id": userId, "email": payload["email"], "role": role}
+
+    async def getVerifiedUserByEmail(self, email: str):
+        cachedUser = self.authenticatedUserCache.get(email)
+        if cachedUser is not None:
+            user = User(**cachedUser)
+            make_transient_to_detached(user)
+            return user
+        user = await self.repository.findByEmail(email)
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not found")
+        if not user.email_verified_at:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not verified")
+        self.authenticatedUserCache.set(email, user.model_dump())
+        return user
+
+    async def validateJWToken(self, token: str):
+        payload = self.decodeJWToken(token)
+        return await self.getVerifiedUserByEmail(payload["email"])
+
     def hashPassword(self, password: str):
         return pwd_context.hash(password)
     
@@ -90,18 +128,18 @@ class AuthService:
     def verifyPassword(self, plain_password: str, hashed_password: str):
         return pwd_context.verify(plain_password, hashed_password)
     
-    def sendEmailToVerifyEmail(self, user: User, background_tasks: BackgroundTasks):  
+    async def sendEmailToVerifyEmail(self, user: User, background_tasks: BackgroundTasks):  
         if user.email_verified_at:
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User already verified")    
           
-        user = self.updateVerificationUUID(user)
+        user = await self.updateVerificationUUID(user)
 
         verification_url = f"{settings.origin_url}/login?uuid={user.verification_uuid}"
         self.emailService.sendEmailVerification(user.email, "Email Verification", verification_url, background_tasks)
         
         return True
     
-    def verifyEmail(self, user: User):        
+    async def verifyEmail(self, user: User):        
         if user.email_verified_at:
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User already verified")
         
@@ -109,21 +147,22 @@ class AuthService:
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="UUID expired")
         
         user.email_verified_at=datetime.now(timezone.utc).replace(tzinfo=None)
-        self.updateVerificationUUID(user)
+        await self.updateVerificationUUID(user)
+        afterCommit(lambda: self.authenticatedUserCache.invalidate(user.email))
         return True
     
-    def sendEmailToResetPassword(self, user: User, background_tasks: BackgroundTasks):
+    async def sendEmailToResetPassword(self, user: User, background_tasks: BackgroundTasks):
         if not user.email_verified_at:
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User not verified")
         
-        user = self.updateVerificationUUID(user)
+        user = await self.updateVerificationUUID(user)
 
         verification_url = f"{settings.origin_url}/reset-password?uuid={user.verification_uuid}"
         self.emailService.sendPasswordReset(user.email, "Reset Password", verification_url, background_tasks)
         
         return True
 
-    def resetPassword(self, user: User, newHashedPassword: str):
+    async def resetPassword(self, user: User, newHashedPassword: str):
         if not user.email_verified_at:
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User not verified")
         
@@ -131,18 +170,23 @@ class AuthService:
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="UUID expired")
         
         user.hashed_password = newHashedPassword
-        self.updateVerificationUUID(user)
+        await self.updateVerificationUUID(user)
+        email, userId = user.email, user.id
+        def forgetUser():
+            self.authenticatedUserCache.invalidate(email)
+            self.revokedTokens.revoke(userId)
+        afterCommit(forgetUser)
         
         return True
     
-    def generateUUID(self):
+    async def generateUUID(self):
         verificationUuid = str(uuid.uuid4())
-        while self.repository.findByVerificationUuid(verificationUuid):
+        while await self.repository.findByVerificationUuid(verificationUuid):
             verificationUuid = str(uuid.uuid4())
         return verificationUuid
     
-    def generateUniqueToken(self):
+    async def generateUniqueToken(self):
         uniqueToken = secrets.token_urlsafe(32)
-        while self.repository.findByUniqueToken(uniqueToken):
+        while await self.repository.findByUniqueToken(uniqueToken):
             uniqueToken = secrets.token_urlsafe(32)
         return uniqueToken
@@ -1,79 +1,122 @@
+from typing import Optional
 from fastapi import HTTPException, status
+from core.database import afterCommit
+from crosscutting.cache import RevocationList, TTLCache
 from security.domain.model.user import User
+from crosscutting.ownership_index import OwnershipIndex
+from device.domain.persistence.movement_repository import MovementRepository
+from device.domain.persistence.position_repository import PositionRepository
+from device.domain.persistence.servo_group_repository import ServoGroupRepository
+from device.service.robot_uid_index import RobotUidIndex
 from security.domain.persistence.user_repository import UserRepository
 from security.service.auth_service import pwd_context
 
 class UserService:
-    def __init__(self, userRepository: UserRepository):
+    def __init__(self, userRepository: UserRepository, 
+                 servoGroupRepository: ServoGroupRepository,
+                 movementRepository: MovementRepository,
+                 positionRepository: PositionRepository,
+                 robotUidIndex: RobotUidIndex,
+                 ownershipIndex: OwnershipIndex,
+                 authenticatedUserCache: TTLCache,
+                 revokedTokens: RevocationList):
         self.repository = userRepository
+        self.servoGroupRepository = servoGroupRepository
+        self.movementRepository = movementRepository
+        self.positionRepository = positionRepository
+        self.robotUidIndex = robotUidIndex
+        self.ownershipIndex = ownershipIndex
+        self.authenticatedUserCache = authenticatedUserCache
+        self.revokedTokens = revokedTokens
     
-    def getByVerificationUUID(self, verificationUuid: str):
-        user = self.repository.findByVerificationUuid(verificationUuid)
+    async def getByVerificationUUID(self, verificationUuid: str):
+        user = await self.repository.findByVerificationUuid(verificationUuid)
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         return user
     
-    def getByUniqueToken(self, uniqueToken: str):
-        user = self.repository.findByUniqueToken(uniqueToken)
+    async def getByUniqueToken(self, uniqueToken: str):
+        user = await self.repository.findByUniqueToken(uniqueToken)
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         return user
     
-    def getByEmail(self, email: str):
-        user = self.repository.findByEmail(email)
+    async def getByEmail(self, email: str):
+        user = await self.repository.findByEmail(email)
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         return user
     
-    def getByUsername(self, username: str):
-        user = self.repository.findByUsername(username)
+    async def getByUsername(self, username: str):
+        user = await self.repository.findByUsername(username)
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         return user
     
-    def getById(self, userId: int):
-        user = self.repository.findById(userId)
+    async def getById(self, userId: int):
+        user = await self.repository.findById(userId)
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         return user
     
-    def getAll(self):
-        users = self.repository.findAll()
-        if not users:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No users found")
-        return users
+    async def getPage(self, limit: int, afterId: Optional[int] = None, usernamePrefix: Optional[str] = None):
+        # Se pide un usuario de más para saber si existe una página siguiente
+        users = await self.repository.findPage(limit + 1, afterId, usernamePrefix)
+        nextCursor = users[limit - 1].id if len(users) > limit else None
+        return users[:limit], nextCursor
     
-    def update(self, userToUpdate: User, newUsername:str):
-        if newUsername != userToUpdate.username and self.repository.findByUsername(newUsername):
+    async def update(self, userToUpdate: User, newUsername:str):
+        if newUsername != userToUpdate.username and await self.repository.findByUsername(newUsername):
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User already exists")
         
         userToUpdate.username = newUsername
-        return self.repository.save(userToUpdate)
+        user = await self.repository.save(userToUpdate)
+        afterCommit(lambda: self.authenticatedUserCache.invalidate(user.email))
+        return user
 
-    def delete(self, userToDelete: User):
-        self.repository.deleteById(userToDelete.id)
+    async def delete(self, userToDelete: User):
+        await self.repository.deleteById(userToDelete.id)
+        email, userId = userToDelete.email, userToDelete.id
+        def forgetUser():
+            self.authenticatedUserCache.invalidate(email)
+            self.revokedTokens.revoke(userId)
+            self.ownershipIndex.forgetUser(userId)
+            self.robotUidIndex.removeByUserId(userId)
+        afterCommit(forgetUser)
         return True
     
-    def validateRobotAccess(self, userId: int, robotId: int):
-        user = self.repository.findByRobotId(robotId)
-        if not user or userId != user.id:
+    # Dueño de cada recurso a partir del índice de pertenencia en memoria, la BD solo se consulta si falta la entrada
+    async def getOwnerIdByRobotId(self, robotId: int):
+        return await self.ownershipIndex.resolve("robot", robotId, self.repository.findIdByRobotId)
+    
+    async def getOwnerIdByServoGroupId(self, servoGroupId: int):
+        owner = await self.ownershipIndex.resolve("servoGroup", servoGroupId, self.servoGroupRepository.findOwnerIdsById)
+        return owner and owner.user_id
+    
+    async def getOwnerIdByMovementId(self, movementId: int):
+        owner = await self.ownershipIndex.resolve("movement", movementId, self.movementRepository.findOwnerIdsById)
+        return owner and owner.user_id
+    
+    async def getOwnerIdByPositionId(self, positionId: int):
+        owner = await self.ownershipIndex.resolve("position", positionId, self.positionRepository.findOwnerIdsById)
+        return owner and owner.user_id
+    
+    async def validateRobotAccess(self, userId: int, robotId: int):
+        if userId != await self.getOwnerIdByRobotId(robotId):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied to resource")
-        return user
+        return True
         
-    def validateServoGroupAccess(self, userId: int, servoGroupId: int):
-        user = self.repository.findByServoGroupId(servoGroupId)
-        if not user or userId != user.id:
+    async def validateServoGroupAccess(self, userId: int, servoGroupId: int):
+        if userId != await self.getOwnerIdByServoGroupId(servoGroupId):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied to resource")
-        return user
+        return True
         
-    def validateMovementAccess(self, userId: int, movementId: int):
-        user = self.repository.findByMovementId(movementId)
-        if not user or userId != user.id:
+    async def validateMovementAccess(self, userId: int, movementId: int):
+        if userId != await self.getOwnerIdByMovementId(movementId):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied to resource")
-        return user
+        return True
         
-    def validatePositionAccess(self, userId: int, positionId: int):
-        user = self.repository.findByPositionId(positionId)
-        if not user or userId != user.id:
+    async def validatePositionAccess(self, userId: int, positionId: int):
+        if userId != await self.getOwnerIdByPositionId(positionId):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied to resource")
-        return user
+        return True
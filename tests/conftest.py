@@ -0,0 +1,100 @@
+import os
+import secrets
+import sqlite3
+import tempfile
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import pytest
+
+# La configuración se lee al importar core.config, por eso se fija antes de importar la aplicación.
+# SQLite en un fichero temporal y transporte MQTT nulo: los tests no necesitan BD ni broker externos.
+databasePath = os.path.join(tempfile.mkdtemp(), "test.db")
+for name, value in {
+    "DATABASE_URL": f"sqlite:///{databasePath}",
+    "ORIGIN_URL": "http://localhost",
+    "INITIAL_ADMIN_EMAIL": "admin@example.com",
+    "INITIAL_ADMIN_USERNAME": "admin",
+    "INITIAL_ADMIN_PASSWORD": "admin",
+    "SECRET_KEY": "test-secret-key-with-enough-length-for-hs256",
+    "MQTT_TRANSPORT": "null",
+    "MQTT_BROKER_URL": "localhost",
+    "MQTT_CLIENT_ID": "tests",
+    "MQTT_USERNAME": "tests",
+    "MQTT_PASSWORD": "tests",
+    "MAIL_USERNAME": "tests",
+    "MAIL_PASSWORD": "tests",
+    "MAIL_FROM": "tests@example.com",
+    "CLOUDINARY_CLOUD_NAME": "tests",
+    "CLOUDINARY_API_KEY": "tests",
+    "CLOUDINARY_API_SECRET": "tests",
+    "MAX_ROBOTS_PER_USER": "1000",
+}.items():
+    os.environ[name] = value
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from core.database import engine
+from security.domain.model.user import Role, User
+from security.service.auth_service import pwd_context
+import main
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+@pytest.fixture(scope="session")
+def headers(client):
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+# Usuario sin privilegios, dueño de nada de lo que crea el administrador
+@pytest.fixture(scope="session")
+def otherHeaders(client):
+    client.portal.call(main.userRepository.save, User(
+        verification_uuid=str(uuid.uuid4()),
+        unique_token=secrets.token_urlsafe(32),
+        email="user@example.com",
+        username="user",
+        hashed_password=pwd_context.hash("user"),
+        email_verified_at=datetime.now(timezone.utc),
+        uuid_expires_at=datetime.now(timezone.utc) + timedelta(days=1),
+        token_expires_at=datetime.now(timezone.utc) + timedelta(days=30),
+        role=Role.USER))
+    response = client.post("/api/v1/auth/login", json={"email": "user@example.com", "password": "user"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture(scope="session")
+def database():
+    connection = sqlite3.connect(databasePath)
+    yield connection
+    connection.close()
+
+# Sentencias SQL (texto y parámetros) ejecutadas dentro del bloque
+@contextmanager
+def capturedStatements():
+    statements = []
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+def createRobot(client, headers):
+    response = client.post("/api/v1/robots/", json={"botname": f"robot-{uuid.uuid4().hex[:8]}", "description": "test"}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def createMovement(client, headers, robotId: int, positions: int):
+    response = client.post("/api/v1/movements/", json={"name": f"movement-{uuid.uuid4().hex[:8]}", "coordinates": None, "robot_id": robotId}, headers=headers)
+    assert response.status_code == 200, response.text
+    movement = response.json()
+    for index in range(positions):
+        response = client.post("/api/v1/positions/", json={"delay": 100 + index, "angles": [index, 90, 180], "movement_id": movement["id"]}, headers=headers)
+        assert response.status_code == 200, response.text
+    return movement
@@ -0,0 +1,35 @@
+from conftest import createMovement, createRobot
+
+def positionsOf(client, headers, movementId):
+    response = client.get(f"/api/v1/positions/movement/{movementId}", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_onlyTheOwnerCanReplaceTheMovementPositions(client, headers, otherHeaders):
+    robot = createRobot(client, headers)
+    movement = createMovement(client, headers, robot["id"], positions=2)
+    before = positionsOf(client, headers, movement["id"])
+
+    response = client.put(f"/api/v1/positions/movement/{movement['id']}", json={"positions": []}, headers=otherHeaders)
+    assert response.status_code == 403
+    assert positionsOf(client, headers, movement["id"]) == before
+
+def test_onlyTheOwnerCanReorderPositionsAndServoGroups(client, headers, otherHeaders):
+    robot = createRobot(client, headers)
+    movement = createMovement(client, headers, robot["id"], positions=2)
+    positions = positionsOf(client, headers, movement["id"])
+    servoGroup = client.post("/api/v1/servo-groups/", json={"name": "group", "num_servos": 2, "column": "left", "robot_id": robot["id"]}, headers=headers).json()
+
+    positionIds = [position["id"] for position in reversed(positions)]
+    requests = [
+        (f"/api/v1/positions/movement/{movement['id']}/reorder", {"position_ids": positionIds}),
+        (f"/api/v1/positions/{positions[0]['id']}/move-to", {"sequence": 2}),
+        (f"/api/v1/servo-groups/robot/{robot['id']}/reorder", {"column": "left", "servo_group_ids": [servoGroup["id"]]}),
+        (f"/api/v1/servo-groups/{servoGroup['id']}/move-to", {"sequence": 1}),
+    ]
+    for url, body in requests:
+        assert client.put(url, json=body, headers=otherHeaders).status_code == 403, url
+    assert positionsOf(client, headers, movement["id"]) == positions
+
+    for url, body in requests:
+        assert client.put(url, json=body, headers=headers).status_code == 200, url
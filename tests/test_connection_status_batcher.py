@@ -0,0 +1,25 @@
+import asyncio
+from device.service.connection_status_batcher import ConnectionStatusBatcher
+
+class FailingRepository:
+    async def updateConnectionStatusByUniqueUids(self, uniqueUids, isConnected, changedAt):
+        raise RuntimeError("database unavailable")
+
+def test_olderStatusesAreIgnored():
+    batcher = ConnectionStatusBatcher(FailingRepository(), flushInterval=1)
+    batcher.set("robot", True, 5)
+    batcher.set("robot", False, 3)
+    assert batcher.pending == {"robot": (True, 5)}
+
+    # Un estado que llega después de que se escribiera uno más reciente tampoco se aplica
+    asyncio.run(batcher.flush())
+    batcher.set("robot", False, 4)
+    assert batcher.pending == {"robot": (True, 5)}
+
+def test_requeuedStatusesDoNotOverwriteNewerOnes():
+    batcher = ConnectionStatusBatcher(FailingRepository(), flushInterval=1)
+    batcher.set("robot", True, 1)
+    statuses, batcher.pending = batcher.pending, {}
+    batcher.set("robot", False, 2)
+    batcher.requeue(statuses)
+    assert batcher.pending == {"robot": (False, 2)}
@@ -0,0 +1,22 @@
+import asyncio
+import random
+from crosscutting.mqtt_ingest import MqttIngestPipeline
+
+def test_messagesOfTheSameRobotAreHandledInArrivalOrder():
+    handled = {}
+
+    async def handler(topic, payload, sequence):
+        await asyncio.sleep(random.uniform(0, 0.005))
+        handled.setdefault(topic.split('/')[1], []).append(int(payload))
+
+    async def run():
+        pipeline = MqttIngestPipeline(maxSize=1000, workers=4, drainTimeout=5)
+        await pipeline.start(handler, partitionKey=lambda topic: topic.split('/')[1])
+        for sequence in range(50):
+            for robot in ("a", "b", "c"):
+                pipeline.submit(f"robot/{robot}/access/status", str(sequence).encode())
+        await asyncio.sleep(0)
+        await pipeline.stop()
+
+    asyncio.run(run())
+    assert handled == {robot: list(range(50)) for robot in ("a", "b", "c")}
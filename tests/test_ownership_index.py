@@ -0,0 +1,33 @@
+import asyncio
+from collections import namedtuple
+from crosscutting.ownership_index import OwnershipIndex
+
+Owner = namedtuple("Owner", ["robot_id", "user_id"])
+PositionOwner = namedtuple("PositionOwner", ["robot_id", "user_id", "movement_id"])
+
+def loaded(ownershipIndex):
+    return {kind: set(owners.entries) for kind, owners in ownershipIndex.owners.items()}
+
+def fill(ownershipIndex):
+    async def resolveAll():
+        for robotId, userId in [(1, 10), (2, 10), (3, 20)]:
+            await ownershipIndex.resolve("robot", robotId, lambda _: asyncio.sleep(0, userId))
+        for movementId, robotId, userId in [(100, 1, 10), (200, 2, 10), (300, 3, 20)]:
+            await ownershipIndex.resolve("movement", movementId, lambda _: asyncio.sleep(0, Owner(robotId, userId)))
+        for positionId, movementId, robotId, userId in [(1000, 100, 1, 10), (1001, 100, 1, 10), (2000, 200, 2, 10), (3000, 300, 3, 20)]:
+            await ownershipIndex.resolve("position", positionId, lambda _: asyncio.sleep(0, PositionOwner(robotId, userId, movementId)))
+    asyncio.run(resolveAll())
+
+def test_forgettingAnEntityOnlyForgetsItsDependents():
+    ownershipIndex = OwnershipIndex(100, 60)
+    fill(ownershipIndex)
+
+    ownershipIndex.forgetPositionsOfMovement(100)
+    assert loaded(ownershipIndex)["position"] == {2000, 3000}
+    assert loaded(ownershipIndex)["movement"] == {100, 200, 300}
+
+    ownershipIndex.forgetRobot(2)
+    assert loaded(ownershipIndex) == {"robot": {1, 3}, "movement": {100, 300}, "servoGroup": set(), "position": {3000}}
+
+    ownershipIndex.forgetUser(20)
+    assert loaded(ownershipIndex) == {"robot": {1}, "movement": {100}, "servoGroup": set(), "position": set()}
@@ -0,0 +1,83 @@
+import json
+import timeit
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlmodel import SQLModel
+from core.config import settings
+from core.migrations import packPositionAngles
+from device.domain.model.position import Position
+from device.domain.model.position_angles import dumpAngles, loadAngles, packAngles, unpackAngles
+
+# Un movimiento completo: 16 posiciones de un robot de 24 servos
+MOVEMENT = [[(position * 7 + servo * 13) % 181 for servo in range(24)] for position in range(16)]
+
+def bestOf(function, number: int = 2000, repeat: int = 5) -> float:
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+def test_packedAnglesRoundTrip(monkeypatch):
+    for binary in (False, True):
+        monkeypatch.setattr(settings, "position_angles_binary", binary)
+        for angles in ([], [0, 90, 180], MOVEMENT[3]):
+            assert loadAngles(Position(delay=100, sequence=1, movement_id=1, **dumpAngles(angles))) == angles
+
+def test_packedAnglesAreSmallerThanJson():
+    for angles in MOVEMENT:
+        assert len(packAngles(angles)) == len(angles) < len(json.dumps(angles).encode()) / 3
+
+def test_migrationPacksEveryRow(monkeypatch):
+    monkeypatch.setattr(settings, "position_angles_binary", True)
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine, tables=[Position.__table__])
+    with engine.begin() as connection:
+        connection.execute(insert(Position), migrationRows(100))
+        packPositionAngles(connection)
+        migratedRows = connection.execute(select(Position.angles, Position.angles_packed)).all()
+
+    assert all(angles == "" and packed is not None for angles, packed in migratedRows)
+    assert [unpackAngles(packed) for _, packed in migratedRows[:16]] == MOVEMENT
+
+def migrationRows(count: int):
+    return [{"delay": 100, "angles": json.dumps(MOVEMENT[index % 16]), "sequence": index % 16 + 1, "movement_id": index // 16 + 1}
+            for index in range(count)]
+
+# Los benchmarks no se ejecutan por defecto: python -m pytest -m benchmark
+@pytest.mark.benchmark
+def test_benchmarkPackedAnglesAgainstJson(record_property):
+    jsonRows = [json.dumps(angles) for angles in MOVEMENT]
+    packedRows = [packAngles(angles) for angles in MOVEMENT]
+
+    jsonLoad = bestOf(lambda: [json.loads(row) for row in jsonRows])
+    packedLoad = bestOf(lambda: [unpackAngles(row) for row in packedRows])
+    jsonDump = bestOf(lambda: [json.dumps(angles) for angles in MOVEMENT])
+    packedDump = bestOf(lambda: [packAngles(angles) for angles in MOVEMENT])
+
+    record_property("movement_load_us", {"json": jsonLoad * 1e6, "packed": packedLoad * 1e6})
+    record_property("movement_dump_us", {"json": jsonDump * 1e6, "packed": packedDump * 1e6})
+    assert packedLoad < jsonLoad
+    assert packedDump < jsonDump
+
+@pytest.mark.benchmark
+def test_benchmarkBatchedMigrationAgainstPerRowUpdates(monkeypatch, record_property):
+    monkeypatch.setattr(settings, "position_angles_binary", True)
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine, tables=[Position.__table__])
+    rows = migrationRows(5000)
+
+    with engine.begin() as connection:
+        connection.execute(insert(Position), rows)
+        start = timeit.default_timer()
+        packPositionAngles(connection)
+        batched = timeit.default_timer() - start
+        connection.rollback()
+
+    with engine.begin() as connection:
+        connection.execute(insert(Position), rows)
+        start = timeit.default_timer()
+        for row in connection.execute(select(Position.id, Position.angles)).all():
+            connection.execute(Position.__table__.update()
+                               .where(Position.id == row.id)
+                               .values(angles="", angles_packed=packAngles(json.loads(row.angles))))
+        perRow = timeit.default_timer() - start
+
+    record_property("migration_5000_rows_ms", {"batched": batched * 1000, "per_row": perRow * 1000})
+    assert batched < perRow
@@ -0,0 +1,39 @@
+from conftest import capturedStatements, createMovement, createRobot
+import main
+
+def userQueries(statements):
+    return [statement for statement, _ in statements if "FROM users" in statement]
+
+def test_authenticationLooksUpTheUserOncePerRequest(client, headers):
+    main.container.authenticatedUserCache().clear()
+    with capturedStatements() as statements:
+        response = client.get("/api/v1/robots/my", headers=headers)
+    assert response.status_code == 200
+    # authorizeRoles y el endpoint comparten el mismo AuthContext
+    assert len(userQueries(statements)) == 1
+
+    with capturedStatements() as statements:
+        response = client.get("/api/v1/robots/my", headers=headers)
+    assert response.status_code == 200
+    assert userQueries(statements) == []
+
+def test_robotTreeUsesAConstantNumberOfQueries(client, headers):
+    robot = createRobot(client, headers)
+    createMovement(client, headers, robot["id"], positions=2)
+
+    def treeQueries():
+        with capturedStatements() as statements:
+            response = client.get(f"/api/v1/robots/{robot['id']}/tree", headers=headers)
+        assert response.status_code == 200
+        return len(statements), response.json()
+
+    # La primera llamada carga el dueño del robot en el índice de pertenencia
+    treeQueries()
+    queriesWithOneMovement, _ = treeQueries()
+    for _ in range(3):
+        createMovement(client, headers, robot["id"], positions=4)
+    queriesWithFourMovements, tree = treeQueries()
+
+    assert len(tree["movements"]) == 4
+    assert sum(len(movement["positions"]) for movement in tree["movements"]) == 14
+    assert queriesWithFourMovements == queriesWithOneMovement
@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import create_engine
+from conftest import capturedStatements, createMovement, createRobot, databasePath
+from core.migrations import runMigrations
+
+# Sentencias ejecutadas por la petición que contienen todos los fragmentos, con su plan en SQLite
+def queryPlans(database, statements, *fragments):
+    plans = []
+    for statement, parameters in statements:
+        if all(fragment in statement for fragment in fragments):
+            rows = database.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            plans.append(" | ".join(row[-1] for row in rows))
+    assert plans, f"No se ejecutó ninguna sentencia con {fragments}"
+    return plans
+
+@pytest.fixture(scope="module")
+def robotWithMovement(client, headers):
+    robot = createRobot(client, headers)
+    movement = createMovement(client, headers, robot["id"], positions=3)
+    return robot, movement
+
+def test_positionsByMovementUseMovementSequenceIndex(client, headers, database, robotWithMovement):
+    _, movement = robotWithMovement
+    with capturedStatements() as statements:
+        assert client.get(f"/api/v1/positions/movement/{movement['id']}", headers=headers).status_code == 200
+    for plan in queryPlans(database, statements, "FROM positions", "positions.movement_id = ?"):
+        assert "ix_positions_movement_id_sequence" in plan, plan
+
+def test_movementLookupsUseRobotIndexes(client, headers, database, robotWithMovement):
+    robot, _ = robotWithMovement
+    with capturedStatements() as statements:
+        response = client.post("/api/v1/movements/", json={"name": "wave", "coordinates": {"coord_x": 1, "coord_y": 2}, "robot_id": robot["id"]}, headers=headers)
+        assert response.status_code == 200, response.text
+    for plan in queryPlans(database, statements, "FROM movements", "movements.name = ?"):
+        assert "ix_movements_robot_id_name" in plan, plan
+    for plan in queryPlans(database, statements, "FROM movements", "movements.coordinates = ?"):
+        assert "ix_movements_robot_id_coordinates" in plan, plan
+
+def test_servoGroupMaxSequenceUsesColumnSequenceIndex(client, headers, database, robotWithMovement):
+    robot, _ = robotWithMovement
+    with capturedStatements() as statements:
+        response = client.post("/api/v1/servo-groups/", json={"name": "arm", "num_servos": 2, "column": "left", "robot_id": robot["id"]}, headers=headers)
+        assert response.status_code == 200, response.text
+    for plan in queryPlans(database, statements, "FROM servo_groups", "servo_groups.\"column\" = ?", "ORDER BY servo_groups.sequence DESC"):
+        assert "ix_servo_groups_robot_id_column_sequence" in plan, plan
+
+def test_robotsByUserUseUserIndex(client, headers, database, robotWithMovement):
+    with capturedStatements() as statements:
+        assert client.get("/api/v1/robots/my", headers=headers).status_code == 200
+    for plan in queryPlans(database, statements, "FROM robots", "robots.user_id = ?"):
+        assert "ix_robots_user_id" in plan, plan
+
+def test_migrationCreatesMissingIndexes(client, database):
+    database.execute("DROP INDEX ix_positions_movement_id_sequence")
+    database.commit()
+
+    with create_engine(f"sqlite:///{databasePath}").begin() as connection:
+        runMigrations(connection)
+
+    indexes = {row[1] for row in database.execute("PRAGMA index_list(positions)")}
+    assert "ix_positions_movement_id_sequence" in indexes
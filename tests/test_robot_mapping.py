@@ -0,0 +1,47 @@
+import json
+import timeit
+import uuid
+import pytest
+import device.mapping.robot_mapper as robotMapperModule
+from device.domain.model.position_json import loadPosition
+from device.domain.model.robot import Robot
+from device.mapping.robot_mapper import RobotMapper
+
+ROBOTS = 300
+POSITION = {"delay": 250, "angles": list(range(0, 180, 8))}
+
+# Camino anterior: texto JSON que se parsea y se valida con pydantic en cada lectura
+def validatedPosition(position: dict):
+    return loadPosition(json.dumps(position))
+
+@pytest.fixture(scope="module")
+def manyRobots(client, headers, database):
+    userId = client.get("/api/v1/users/me", headers=headers).json()["id"]
+    database.executemany(
+        "INSERT INTO robots (unique_uid, botname, description, initial_position, current_position, is_connected_broker, created_at, user_id) "
+        "VALUES (?, ?, 'benchmark', ?, ?, 0, CURRENT_TIMESTAMP, ?)",
+        [(str(uuid.uuid4()), f"bench-{uuid.uuid4().hex[:12]}", json.dumps(POSITION), json.dumps(POSITION), userId) for _ in range(ROBOTS)])
+    database.commit()
+
+def test_robotPositionsAreMappedFromNativeJson(client, headers, manyRobots):
+    robots = [robot for robot in client.get("/api/v1/robots/my", headers=headers).json() if robot["description"] == "benchmark"]
+    assert len(robots) == ROBOTS
+    assert all(robot["initial_position"] == POSITION and robot["current_position"] == POSITION for robot in robots)
+
+# Los benchmarks no se ejecutan por defecto: python -m pytest -m benchmark
+@pytest.mark.benchmark
+def test_benchmarkRobotMappingWithoutRevalidation(client, headers, manyRobots, monkeypatch, record_property):
+    robots = [Robot(id=index, unique_uid=str(index), botname=str(index), description="benchmark", user_id=1,
+                    initial_position=dict(POSITION), current_position=dict(POSITION)) for index in range(ROBOTS)]
+    mapRobots = lambda: [RobotMapper.modelToResponse(robot) for robot in robots]
+    getMyRobots = lambda: client.get("/api/v1/robots/my", headers=headers)
+
+    constructedMapping = min(timeit.repeat(mapRobots, number=5, repeat=5)) / 5
+    constructedEndpoint = min(timeit.repeat(getMyRobots, number=1, repeat=5))
+    monkeypatch.setattr(robotMapperModule, "constructPosition", validatedPosition)
+    validatedMapping = min(timeit.repeat(mapRobots, number=5, repeat=5)) / 5
+    validatedEndpoint = min(timeit.repeat(getMyRobots, number=1, repeat=5))
+
+    record_property("mapping_ms", {"constructed": constructedMapping * 1000, "validated": validatedMapping * 1000})
+    record_property("get_my_robots_ms", {"constructed": constructedEndpoint * 1000, "validated": validatedEndpoint * 1000})
+    assert constructedMapping < validatedMapping